@@ -2,7 +2,12 @@ from django.contrib import messages
 
 from edc_base.utils import get_utcnow
 
+from .instrumentation import timed
 
+verification_fields = ['is_verified', 'is_verified_datetime', 'verified_by']
+
+
+@timed('actions.verify_consent')
 def verify_consent(request=None, consent_obj=None):
     consent_obj.is_verified = True
     consent_obj.is_verified_datetime = get_utcnow()
@@ -21,17 +26,75 @@ def unverify_consent(consent_obj=None):
     return consent_obj
 
 
+def update_verification(queryset=None, user=None, batch_size=None, **values):
+    """Updates the verification fields of the consents in the
+    queryset and returns the number of consents updated.
+
+    Uses a single UPDATE unless the model keeps history, in which
+    case consents are updated in chunks with bulk_update and their
+    historical records created with bulk_history_create.
+    """
+    batch_size = batch_size or 500
+    history = getattr(queryset.model, 'history', None)
+    if not hasattr(history, 'bulk_history_create'):
+        return queryset.update(**values)
+    updated = 0
+    batch = []
+    for consent_obj in queryset.iterator(chunk_size=batch_size):
+        for attr, value in values.items():
+            setattr(consent_obj, attr, value)
+        consent_obj._history_user = user
+        batch.append(consent_obj)
+        if len(batch) >= batch_size:
+            updated += update_verification_batch(queryset.model, batch)
+            batch = []
+    if batch:
+        updated += update_verification_batch(queryset.model, batch)
+    return updated
+
+
+def update_verification_batch(model=None, batch=None):
+    model.objects.bulk_update(batch, verification_fields)
+    model.history.bulk_history_create(batch, update=True)
+    return len(batch)
+
+
+@timed('actions.verify_consents')
+def verify_consents(queryset=None, user=None, batch_size=None):
+    """Flags the consents in the queryset as verified against the
+    paper document by user and returns the number verified.
+    """
+    return update_verification(
+        queryset=queryset.filter(is_verified=False),
+        user=user,
+        batch_size=batch_size,
+        is_verified=True,
+        is_verified_datetime=get_utcnow(),
+        verified_by=user.username)
+
+
+def unverify_consents(queryset=None, user=None, batch_size=None):
+    """Unflags the consents in the queryset as verified and returns
+    the number unverified.
+    """
+    return update_verification(
+        queryset=queryset.filter(is_verified=True),
+        user=user,
+        batch_size=batch_size,
+        is_verified=False,
+        is_verified_datetime=None,
+        verified_by=None)
+
+
 def flag_as_verified_against_paper(modeladmin, request, queryset, **kwargs):
     """Flags instance as verified against the paper document.
     """
-    for consent_obj in queryset:
-        consent_obj = verify_consent(request, consent_obj)
-        messages.add_message(
-            request,
-            messages.SUCCESS,
-            f'\'{consent_obj._meta.verbose_name}\' for \' '
-            f'{consent_obj.subject_identifier}\' '
-            f'has been verified against the paper document.')
+    verified = verify_consents(queryset=queryset, user=request.user)
+    messages.add_message(
+        request,
+        messages.SUCCESS,
+        f'{verified} \'{queryset.model._meta.verbose_name_plural}\' '
+        f'have been verified against the paper document.')
 
 
 flag_as_verified_against_paper.short_description = "Verify consent against paper document"
@@ -40,8 +103,12 @@ flag_as_verified_against_paper.short_description = "Verify consent against paper
 def unflag_as_verified_against_paper(modeladmin, request, queryset, **kwargs):
     """Unflags instance as verified.
     """
-    for consent_obj in queryset:
-        unverify_consent(consent_obj)
+    unverified = unverify_consents(queryset=queryset, user=request.user)
+    messages.add_message(
+        request,
+        messages.SUCCESS,
+        f'{unverified} \'{queryset.model._meta.verbose_name_plural}\' '
+        f'have been unverified.')
 
 
 unflag_as_verified_against_paper.short_description = "Unverify consent"
@@ -12,16 +12,66 @@ class AppConfig(DjangoAppConfig):
     default_consent_group = DEFAULT_CONSENT_GROUP
 
     def ready(self):
+        from .instrumentation import instrumentation
         from .site_consents import site_consents
-        from .signals import requires_consent_on_pre_save
-
-        sys.stdout.write(f'Loading {self.verbose_name} ...\n')
-        site_consents.autodiscover()
-        for consent in site_consents.consents:
-            start = consent.start.strftime('%Y-%m-%d %Z')
-            end = consent.end.strftime('%Y-%m-%d %Z')
-            sys.stdout.write(f' * {consent} covering {start} to {end}\n')
-        sys.stdout.write(f' Done loading {self.verbose_name}.\n')
+        from .signals import connect_consent_model_signals
+        from .signals import connect_site_visit_schedules
+        from .signals import sync_requires_consent_signals
+
+        instrumentation.configure(sink=self.instrumentation_sink)
+        verbose = self.verbose
+        if verbose:
+            sys.stdout.write(f'Loading {self.verbose_name} ...\n')
+        if self.lazy_autodiscover:
+            site_consents.defer_autodiscover(verbose=verbose)
+            if verbose:
+                sys.stdout.write(' * deferred loading site consents.\n')
+        else:
+            site_consents.autodiscover(verbose=verbose)
+            if verbose:
+                for consent in site_consents.consents:
+                    start = consent.start.strftime('%Y-%m-%d %Z')
+                    end = consent.end.strftime('%Y-%m-%d %Z')
+                    sys.stdout.write(f' * {consent} covering {start} to {end}\n')
+        connect_consent_model_signals()
+        connect_site_visit_schedules()
+        sync_requires_consent_signals()
+        if verbose:
+            sys.stdout.write(f' Done loading {self.verbose_name}.\n')
+
+    @property
+    def verbose(self):
+        """Returns settings.EDC_CONSENT_VERBOSE or, if not set,
+        True if stdout is a TTY.
+
+        If False, startup only logs one record. See autodiscover.
+        """
+        verbose = getattr(settings, 'EDC_CONSENT_VERBOSE', None)
+        if verbose is None:
+            try:
+                verbose = sys.stdout.isatty()
+            except (AttributeError, ValueError):
+                verbose = False
+        return verbose
+
+    @property
+    def lazy_autodiscover(self):
+        """Returns settings.EDC_CONSENT_LAZY_AUTODISCOVER, default False.
+
+        If True, site consents are discovered on first access or
+        by calling `site_consents.ensure_loaded()`, e.g. to warm up
+        a web worker.
+        """
+        return getattr(settings, 'EDC_CONSENT_LAZY_AUTODISCOVER', False)
+
+    @property
+    def instrumentation_sink(self):
+        """Returns settings.EDC_CONSENT_INSTRUMENTATION, default None.
+
+        One of 'logging', 'statsd' or None to disable. See
+        edc_consent.instrumentation.
+        """
+        return getattr(settings, 'EDC_CONSENT_INSTRUMENTATION', None)
 
 
 if settings.APP_NAME == 'edc_consent':
@@ -1,6 +1,8 @@
 from django.apps import apps as django_apps
 from edc_constants.constants import FEMALE, MALE
 
+from .consent_periods import utc_ordinal
+
 
 class InvalidGender(Exception):
     pass
@@ -12,6 +14,18 @@ class NaiveDatetimeError(Exception):
 
 class Consent:
 
+    """A class that represents the general attributes of a consent.
+
+    Instances are immutable and hashable. Use `replace` to get a
+    copy with changed attributes.
+    """
+
+    __slots__ = (
+        'model', 'group', 'start', 'end', 'version', 'gender',
+        'updates_versions', 'age_min', 'age_max', 'age_is_adult',
+        'subject_type', 'name', 'start_ordinal', 'end_ordinal',
+        '_model_cls', '_hash')
+
     default_version = '1'
     default_subject_type = 'subject'
     default_consent_group = django_apps.get_app_config(
@@ -21,8 +35,6 @@ class Consent:
                  version=None, gender=None, updates_versions=None,
                  age_min=None, age_max=None, age_is_adult=None,
                  subject_type=None):
-        """A class that represents the general attributes of a consent.
-        """
         if not start.tzinfo:
             raise NaiveDatetimeError(
                 f'Naive datetime is invalid. Got {start}.')
@@ -31,22 +43,56 @@ class Consent:
                 f'Naive datetime is invalid. Got {end}.')
         if MALE not in gender and FEMALE not in gender:
             raise InvalidGender(f'Invalid gender. Got {gender}.')
-        self.model = model
-        self.group = group or self.default_consent_group
-        self.start = start
-        self.end = end
-        self.updates_versions = updates_versions or []
-        self.version = version or self.default_version
-        self.gender = gender
-        self.age_min = age_min
-        self.age_max = age_max
-        self.age_is_adult = age_is_adult
-        self.subject_type = subject_type or self.default_subject_type
-        if self.updates_versions:
-            if not isinstance(self.updates_versions, (list, tuple)):
-                self.updates_versions = [
-                    x.strip() for x in self.updates_versions.split(',')
-                    if x.strip() != '']
+        updates_versions = updates_versions or []
+        if not isinstance(updates_versions, (list, tuple)):
+            updates_versions = [
+                x.strip() for x in updates_versions.split(',')
+                if x.strip() != '']
+        version = version or self.default_version
+        options = dict(
+            model=model,
+            group=group or self.default_consent_group,
+            start=start,
+            end=end,
+            updates_versions=tuple(updates_versions),
+            version=version,
+            gender=frozenset(gender),
+            age_min=age_min,
+            age_max=age_max,
+            age_is_adult=age_is_adult,
+            subject_type=subject_type or self.default_subject_type,
+            name=f'{model}-{version}',
+            start_ordinal=utc_ordinal(start),
+            end_ordinal=utc_ordinal(end),
+            _model_cls=None)
+        for attr, value in options.items():
+            object.__setattr__(self, attr, value)
+        object.__setattr__(self, '_hash', hash(self.key))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            f'{self.__class__.__name__} is immutable. Use replace(). Got {name}.')
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            f'{self.__class__.__name__} is immutable. Got {name}.')
+
+    def __eq__(self, other):
+        if not isinstance(other, Consent):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__._from_options, (self.options, ))
 
     def __repr__(self):
         return (f'<{self.__class__.__name__}({self.model}, {self.version}) '
@@ -55,10 +101,44 @@ class Consent:
     def __str__(self):
         return f'{self.model} {self.version}'
 
+    @classmethod
+    def _from_options(cls, options=None):
+        return cls(**options)
+
     @property
-    def name(self):
-        return f'{self.model}-{self.version}'
+    def key(self):
+        return (self.model, self.group, self.version, self.start_ordinal,
+                self.end_ordinal, self.gender, self.updates_versions,
+                self.age_min, self.age_max, self.age_is_adult, self.subject_type)
+
+    @property
+    def options(self):
+        """Returns a dictionary of the options to instantiate a copy.
+        """
+        return dict(
+            model=self.model,
+            group=self.group,
+            start=self.start,
+            end=self.end,
+            version=self.version,
+            gender=sorted(self.gender),
+            updates_versions=list(self.updates_versions),
+            age_min=self.age_min,
+            age_max=self.age_max,
+            age_is_adult=self.age_is_adult,
+            subject_type=self.subject_type)
+
+    def replace(self, **changes):
+        """Returns a new Consent with the given attributes changed.
+        """
+        options = self.options
+        options.update(**changes)
+        return self.__class__(**options)
 
     @property
     def model_cls(self):
-        return django_apps.get_model(self.model)
+        """Returns the consent model class, resolved on first use.
+        """
+        if self._model_cls is None:
+            object.__setattr__(self, '_model_cls', django_apps.get_model(self.model))
+        return self._model_cls
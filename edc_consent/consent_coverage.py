@@ -0,0 +1,123 @@
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .exceptions import ConsentObjectDoesNotExist
+from .site_consents import site_consents
+
+
+def coverage_enabled():
+    """Returns True if the consent coverage table is maintained.
+    """
+    return getattr(settings, 'EDC_CONSENT_COVERAGE', False)
+
+
+def get_coverage_model_cls():
+    """Returns the project's ConsentCoverageModelMixin model class
+    from settings.EDC_CONSENT_COVERAGE_MODEL.
+    """
+    coverage_model = getattr(settings, 'EDC_CONSENT_COVERAGE_MODEL', None)
+    if not coverage_model:
+        raise ImproperlyConfigured(
+            'Consent coverage model not set. Declare a model using '
+            'ConsentCoverageModelMixin and set '
+            'settings.EDC_CONSENT_COVERAGE_MODEL.')
+    return django_apps.get_model(coverage_model)
+
+
+def get_coverage(consent_model=None, consent_group=None, subject_identifier=None,
+                 version=None, consent_datetime=None):
+    """Returns an unsaved consent coverage model instance or None if the
+    consent object for the version is not registered.
+
+    The coverage period is the period of the consent object, same
+    as what RequiresConsent checks for a report_datetime.
+    """
+    coverage_model_cls = get_coverage_model_cls()
+    try:
+        consent_object = site_consents.get_consent(
+            model=consent_model,
+            consent_group=consent_group,
+            version=version,
+            report_datetime=consent_datetime)
+    except ConsentObjectDoesNotExist:
+        return None
+    return coverage_model_cls(
+        subject_identifier=subject_identifier,
+        consent_model=consent_model,
+        version=version,
+        valid_from=consent_object.start,
+        valid_to=consent_object.end)
+
+
+def update_coverage(consent_objs=None, batch_size=None):
+    """Replaces the consent coverage rows for a list of consent
+    model instances of the same model and returns the number of
+    rows created.
+    """
+    coverage_model_cls = get_coverage_model_cls()
+    if not consent_objs:
+        return 0
+    opts = consent_objs[0]._meta
+    coverage = []
+    for consent_obj in consent_objs:
+        coverage_obj = get_coverage(
+            consent_model=opts.label_lower,
+            consent_group=opts.consent_group,
+            subject_identifier=consent_obj.subject_identifier,
+            version=consent_obj.version,
+            consent_datetime=consent_obj.consent_datetime)
+        if coverage_obj:
+            coverage.append(coverage_obj)
+    coverage_model_cls.objects.filter(
+        consent_model=opts.label_lower,
+        subject_identifier__in=set(
+            [consent_obj.subject_identifier for consent_obj in consent_objs]),
+        version__in=set([consent_obj.version for consent_obj in consent_objs])).delete()
+    coverage_model_cls.objects.bulk_create(coverage, batch_size=batch_size)
+    return len(coverage)
+
+
+def delete_coverage(consent_obj=None):
+    coverage_model_cls = get_coverage_model_cls()
+    coverage_model_cls.objects.filter(
+        consent_model=consent_obj._meta.label_lower,
+        subject_identifier=consent_obj.subject_identifier,
+        version=consent_obj.version).delete()
+
+
+def rebuild_coverage(model_cls=None, batch_size=None):
+    """Rebuilds the consent coverage rows for a consent model and
+    returns the number of rows created.
+
+    Runs in a transaction so that coverage is not missing while
+    rebuilding or if the rebuild fails.
+    """
+    coverage_model_cls = get_coverage_model_cls()
+    batch_size = batch_size or 500
+    opts = model_cls._meta
+    created = 0
+    batch = []
+    values = model_cls.objects.values_list(
+        'subject_identifier', 'version', 'consent_datetime')
+    with transaction.atomic():
+        coverage_model_cls.objects.filter(consent_model=opts.label_lower).delete()
+        for subject_identifier, version, consent_datetime in values.iterator(
+                chunk_size=batch_size):
+            coverage_obj = get_coverage(
+                consent_model=opts.label_lower,
+                consent_group=opts.consent_group,
+                subject_identifier=subject_identifier,
+                version=version,
+                consent_datetime=consent_datetime)
+            if coverage_obj:
+                batch.append(coverage_obj)
+            if len(batch) >= batch_size:
+                coverage_model_cls.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            coverage_model_cls.objects.bulk_create(batch)
+            created += len(batch)
+    return created
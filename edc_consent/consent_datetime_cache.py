@@ -0,0 +1,101 @@
+import time
+
+from collections import OrderedDict
+from django.conf import settings
+from django.db import connections
+from django.db.models import Min
+from edc_registration.models import RegisteredSubject
+from threading import Lock
+
+
+class ConsentDatetimeCache:
+
+    """A per-process LRU cache, with a time to live, of the earliest
+    consent datetime per subject from RegisteredSubject.
+
+    Only subjects found are cached so that a subject registered by
+    another process is seen on the next lookup. Nothing is cached
+    while in an atomic block since a registration not yet committed
+    may still be rolled back. Entries are
+    invalidated when a RegisteredSubject or consent is saved or
+    deleted in this process; changes made by other processes are
+    seen within `ttl` seconds.
+
+    See settings EDC_CONSENT_REGISTRATION_CACHE_MAXSIZE and
+    EDC_CONSENT_REGISTRATION_CACHE_TTL.
+    """
+
+    default_maxsize = 10000
+    default_ttl = 300
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or getattr(
+            settings, 'EDC_CONSENT_REGISTRATION_CACHE_MAXSIZE', self.default_maxsize)
+        self.ttl = ttl or getattr(
+            settings, 'EDC_CONSENT_REGISTRATION_CACHE_TTL', self.default_ttl)
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_many(self, subject_identifiers=None):
+        """Returns a dictionary of {subject_identifier: consent_datetime}
+        for the registered subjects.
+
+        Subjects not cached are fetched in one query.
+        """
+        now = time.monotonic()
+        consent_datetimes = {}
+        missing = set()
+        with self._lock:
+            for subject_identifier in set(subject_identifiers):
+                entry = self._data.get(subject_identifier)
+                if entry and entry[1] > now:
+                    self._data.move_to_end(subject_identifier)
+                    consent_datetimes[subject_identifier] = entry[0]
+                else:
+                    missing.add(subject_identifier)
+        if missing:
+            fetched = dict(RegisteredSubject.objects.filter(
+                subject_identifier__in=missing,
+                consent_datetime__isnull=False).values(
+                    'subject_identifier').annotate(
+                        consent_datetime=Min('consent_datetime')).values_list(
+                            'subject_identifier', 'consent_datetime'))
+            if not connections[RegisteredSubject.objects.db].in_atomic_block:
+                self.set_many(fetched, expires=now + self.ttl)
+            consent_datetimes.update(fetched)
+        return consent_datetimes
+
+    def set_many(self, consent_datetimes=None, expires=None):
+        with self._lock:
+            for subject_identifier, consent_datetime in consent_datetimes.items():
+                self._data[subject_identifier] = (consent_datetime, expires)
+                self._data.move_to_end(subject_identifier)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, subject_identifier=None):
+        """Returns the subject's earliest consent datetime or None.
+        """
+        return self.get_many([subject_identifier]).get(subject_identifier)
+
+    def is_registered(self, subject_identifier=None, report_datetime=None):
+        """Returns True if the subject is registered with a consent
+        datetime on or before report_datetime.
+        """
+        consent_datetime = self.get(subject_identifier)
+        return consent_datetime is not None and consent_datetime <= report_datetime
+
+    def invalidate(self, subject_identifier=None):
+        """Removes the subject or, if None, all subjects.
+        """
+        with self._lock:
+            if subject_identifier is None:
+                self._data.clear()
+            else:
+                self._data.pop(subject_identifier, None)
+
+
+consent_datetime_cache = ConsentDatetimeCache()
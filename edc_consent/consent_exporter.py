@@ -0,0 +1,103 @@
+import csv
+import json
+
+from django.apps import apps as django_apps
+from django_crypto_fields.fields import BaseField
+
+from .model_mixins import ConsentModelMixin
+
+
+class ConsentExportError(Exception):
+    pass
+
+
+class Echo:
+
+    """A file-like object that returns what is written, for
+    csv.writer to format one row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ConsentExporter:
+
+    """A class to stream consent model rows as CSV or JSON lines
+    with bounded memory.
+
+    Only consent models, i.e. models using ConsentModelMixin, may be
+    exported. Encrypted fields are masked unless listed in `decrypt`.
+    Masked fields are not selected so are never decrypted.
+
+        exporter = ConsentExporter(
+            model='edc_example.subjectconsent', decrypt=['initials'])
+        for line in exporter.lines():
+            f.write(line)
+    """
+
+    default_chunk_size = 500
+    formats = ['csv', 'jsonl']
+    mask = '<encrypted>'
+
+    def __init__(self, model=None, fields=None, decrypt=None, export_format=None,
+                 chunk_size=None, queryset=None):
+        self.model_cls = django_apps.get_model(model)
+        if not issubclass(self.model_cls, ConsentModelMixin):
+            raise ConsentExportError(f'Not a consent model. Got {model}.')
+        self.export_format = export_format or 'csv'
+        if self.export_format not in self.formats:
+            raise ConsentExportError(
+                f'Invalid export format. Expected one of {self.formats}. '
+                f'Got {self.export_format}.')
+        self.chunk_size = chunk_size or self.default_chunk_size
+        self.queryset = self.model_cls.objects.all() if queryset is None else queryset
+        fields_by_name = {
+            field.name: field for field in self.model_cls._meta.concrete_fields}
+        self.fields = []
+        for name in fields or fields_by_name:
+            try:
+                self.fields.append(fields_by_name[name])
+            except KeyError:
+                raise ConsentExportError(f'Unknown field. Got {name}.')
+        self.decrypt = decrypt or []
+        for name in self.decrypt:
+            if not isinstance(fields_by_name.get(name), BaseField):
+                raise ConsentExportError(
+                    f'Cannot decrypt. Not an encrypted field. Got {name}.')
+
+    @property
+    def fieldnames(self):
+        return [field.attname for field in self.fields]
+
+    @property
+    def selected_fields(self):
+        """Returns the field attnames to select, excluding masked
+        encrypted fields.
+        """
+        return [field.attname for field in self.fields
+                if not isinstance(field, BaseField) or field.name in self.decrypt]
+
+    def rows(self):
+        """Yields a dictionary per model instance.
+        """
+        selected_fields = self.selected_fields
+        masked = {name: self.mask for name in self.fieldnames
+                  if name not in selected_fields}
+        values = self.queryset.order_by('pk').values_list(*selected_fields)
+        for value in values.iterator(chunk_size=self.chunk_size):
+            row = dict(masked)
+            row.update(zip(selected_fields, value))
+            yield {name: row[name] for name in self.fieldnames}
+
+    def lines(self):
+        """Yields formatted lines, a header first if CSV.
+        """
+        if self.export_format == 'jsonl':
+            for row in self.rows():
+                yield json.dumps(row, default=str) + '\n'
+        else:
+            writer = csv.writer(Echo())
+            yield writer.writerow(self.fieldnames)
+            for row in self.rows():
+                yield writer.writerow(row.values())
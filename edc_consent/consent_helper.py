@@ -1,6 +1,5 @@
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
-
 from .exceptions import ConsentVersionSequenceError
+from .instrumentation import timed
 from .site_consents import site_consents
 
 
@@ -9,12 +8,15 @@ class ConsentHelper:
     """A class to get the consent configuration object and to
     validate version numbers if this consent is an update
     of a previous.
+
+    Pass `previous_consent`, e.g. as resolved in the form's clean,
+    to not query for it again.
     """
 
     def __init__(self, model_cls=None, update_previous=None, subject_identifier=None,
                  identity=None, first_name=None, consent_datetime=None, dob=None,
                  last_name=None, subject_identifier_as_pk=None,
-                 subject_identifier_aka=None,
+                 subject_identifier_aka=None, previous_consent=None,
                  **kwargs):
         self._previous_consent = None
         self.model_cls = model_cls
@@ -34,18 +36,31 @@ class ConsentHelper:
         self.version = self.consent_object.version
         self.updates_versions = self.consent_object.updates_versions
 
+        if (previous_consent
+                and previous_consent.subject_identifier == subject_identifier
+                and previous_consent.version in self.updates_versions):
+            self._previous_consent = previous_consent
+
         # if updates a previous, validate version sequence
         # and update the subject_identifier_as_pk, etc
         if self.updates_versions and update_previous:
             self.previous_consent.subject_identifier_as_pk = subject_identifier_as_pk
             self.previous_consent.subject_identifier_aka = subject_identifier_aka
-            self.previous_consent.save(
-                update_fields=['subject_identifier_as_pk', 'subject_identifier_aka'])
+            self.model_cls.objects.filter(pk=self.previous_consent.pk).update(
+                subject_identifier_as_pk=subject_identifier_as_pk,
+                subject_identifier_aka=subject_identifier_aka)
+            # update() does not send post_save, so add the historical
+            # record ourselves, see also actions.update_verification
+            history = getattr(self.model_cls, 'history', None)
+            if hasattr(history, 'bulk_history_create'):
+                history.bulk_history_create([self.previous_consent], update=True)
 
     @property
+    @timed('consent_helper.previous_consent')
     def previous_consent(self):
-        """Returns the previous consent or raises if does
-        not exist or is out of sequence with the current.
+        """Returns the previous consent, the latest version if
+        more than one, or raises if does not exist or is out of
+        sequence with the current.
         """
         if not self._previous_consent:
             opts = dict(
@@ -53,9 +68,9 @@ class ConsentHelper:
                 identity=self.identity,
                 version__in=self.consent_object.updates_versions)
             opts = {k: v for k, v in opts.items() if v is not None}
-            try:
-                self._previous_consent = self.model_cls.objects.get(**opts)
-            except ObjectDoesNotExist:
+            previous_consents = list(
+                self.model_cls.objects.filter(**opts).order_by('-version')[:1])
+            if not previous_consents:
                 updates_versions = ', '.join(
                     self.consent_object.updates_versions)
                 raise ConsentVersionSequenceError(
@@ -63,8 +78,5 @@ class ConsentHelper:
                     f'with version in {updates_versions} for {self.subject_identifier} '
                     f'was not found. Consent version \'{self.version}\' is '
                     'configured to update a previous version.')
-            except MultipleObjectsReturned:
-                previous_consents = self.model_cls.objects.filter(
-                    **opts).order_by('-version')
-                self._previous_consent = previous_consents[0]
+            self._previous_consent = previous_consents[0]
         return self._previous_consent
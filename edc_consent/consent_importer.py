@@ -0,0 +1,319 @@
+import csv
+import json
+
+from django.apps import apps as django_apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from django_crypto_fields.fields import BaseField
+from edc_base.utils import age
+from edc_registration.models import RegisteredSubject
+
+from .consent_coverage import coverage_enabled, update_coverage
+from .exceptions import ConsentVersionSequenceError
+from .fingerprint import consent_fingerprint
+from .site_consents import site_consents
+
+
+class ConsentImportError(Exception):
+    pass
+
+
+def read_rows(path=None):
+    """Yields dictionaries from a CSV file or, if the extension is
+    .jsonl, a JSON lines file.
+
+    A JSON line that cannot be parsed is yielded as a string so
+    that the importer rejects it.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line
+        else:
+            for row in csv.DictReader(f):
+                yield row
+
+
+class ConsentImporter:
+
+    """A class to bulk import consents, e.g. historical paper
+    consents, into a consent model.
+
+    Rows are validated and prepared in batches. Versions are
+    resolved from site_consents in memory, new consents are
+    inserted with bulk_create and previous versions are updated
+    with bulk_update. Fields are encrypted as each batch is
+    inserted. Rows that fail are collected in `rejected`. Each
+    batch is imported in a transaction.
+
+    Model save() is not called, so rows must include the
+    subject_identifier. RegisteredSubject rows are created for
+    subjects not yet registered and consent coverage, if enabled,
+    is updated per batch. History and other save() side effects
+    are not created.
+
+        importer = ConsentImporter(model='edc_example.subjectconsent')
+        importer.import_rows(read_rows('consents.csv'))
+        importer.write_rejected('rejected.jsonl')
+    """
+
+    default_batch_size = 500
+    update_fields = ['subject_identifier_as_pk', 'subject_identifier_aka']
+
+    def __init__(self, model=None, batch_size=None):
+        self.model_cls = django_apps.get_model(model)
+        self.batch_size = batch_size or self.default_batch_size
+        self.created = 0
+        self.updated = 0
+        self.rejected = []
+
+    def import_rows(self, rows=None):
+        """Imports an iterable of dictionaries and returns the number
+        of consents created.
+        """
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.created
+
+    def import_batch(self, batch=None):
+        """Imports a list of (row_number, row).
+
+        Any error preparing a row, e.g. a value of the wrong type,
+        rejects the row instead of stopping the import.
+        """
+        prepared = []
+        for row_number, row in batch:
+            try:
+                obj = self.prepare(row)
+            except Exception as e:
+                self.reject(row_number, row, e)
+            else:
+                prepared.append((row_number, row, obj))
+        prepared = self.exclude_existing(prepared)
+        prepared, previous_consents = self.get_previous_consents(prepared)
+        with transaction.atomic():
+            objs = self.create(prepared)
+            self.created += len(objs)
+            subject_identifiers = set([obj.subject_identifier for obj in objs])
+            previous_consents = [
+                previous_consent for previous_consent in previous_consents
+                if previous_consent.subject_identifier in subject_identifiers]
+            self.create_registrations(objs)
+            if coverage_enabled():
+                update_coverage(objs, batch_size=self.batch_size)
+            if previous_consents:
+                self.model_cls.objects.bulk_update(
+                    previous_consents, self.update_fields, batch_size=self.batch_size)
+                self.updated += len(previous_consents)
+
+    def create(self, prepared=None):
+        """Inserts the prepared rows and returns the model instances
+        created.
+
+        If the batch insert raises an IntegrityError, e.g. on a
+        unique constraint not checked in exclude_existing, rows are
+        inserted one at a time and those that fail are rejected.
+        """
+        objs = [obj for _, _, obj in prepared]
+        try:
+            with transaction.atomic():
+                self.model_cls.objects.bulk_create(objs, batch_size=self.batch_size)
+        except IntegrityError:
+            objs = []
+            for row_number, row, obj in prepared:
+                try:
+                    with transaction.atomic():
+                        self.model_cls.objects.bulk_create([obj])
+                except IntegrityError as e:
+                    self.reject(row_number, row, e)
+                else:
+                    objs.append(obj)
+        return objs
+
+    def create_registrations(self, objs=None):
+        """Bulk creates a RegisteredSubject for each subject not yet
+        registered, as the consent model's post_save would, and
+        returns the number created.
+        """
+        if not objs or not hasattr(self.model_cls, 'registration_options'):
+            return 0
+        registered = set(RegisteredSubject.objects.filter(
+            subject_identifier__in=set(
+                [obj.subject_identifier for obj in objs])).values_list(
+                    'subject_identifier', flat=True))
+        registrations = []
+        for obj in objs:
+            if obj.subject_identifier not in registered:
+                registered.add(obj.subject_identifier)
+                registrations.append(RegisteredSubject(**obj.registration_options))
+        RegisteredSubject.objects.bulk_create(registrations, batch_size=self.batch_size)
+        return len(registrations)
+
+    def prepare(self, row=None):
+        """Returns an unsaved model instance for the row with the
+        fields otherwise set in ConsentModelMixin.save().
+        """
+        opts = self.model_cls._meta
+        if not isinstance(row, dict):
+            raise ConsentImportError(f'Invalid row. Got {row!r}.')
+        values = {}
+        for name, value in row.items():
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                raise ConsentImportError(f'Unknown field. Got {name}.')
+            if value == '' and field.null:
+                value = None
+            value = field.to_python(value)
+            if (isinstance(field, models.DateTimeField) and value
+                    and timezone.is_naive(value)):
+                value = timezone.make_aware(value)
+            values.update({field.attname: value})
+        obj = self.model_cls(**values)
+        if not obj.subject_identifier:
+            raise ConsentImportError('Subject identifier is required.')
+        if getattr(obj, 'confirm_identity', obj.identity) != obj.identity:
+            raise ConsentImportError(
+                '\'Identity\' must match \'confirm_identity\'.')
+        obj.full_clean(
+            exclude=[f.name for f in opts.fields if f.name not in row],
+            validate_unique=False)
+        consent_object = site_consents.get_consent_for_period(
+            model=opts.label_lower,
+            consent_group=opts.consent_group,
+            report_datetime=obj.consent_datetime)
+        self.validate_consent_object(obj, consent_object)
+        obj.report_datetime = obj.consent_datetime
+        obj.version = consent_object.version
+        obj.updates_versions = True if consent_object.updates_versions else False
+        obj.fingerprint = consent_fingerprint(
+            first_name=obj.first_name, dob=obj.dob, initials=obj.initials)
+        obj.consent_object = consent_object
+        return obj
+
+    def validate_consent_object(self, obj=None, consent_object=None):
+        """Raises if the gender or the age at consent is not allowed
+        by the consent object, as checked in ConsentModelFormMixin.
+        """
+        if obj.gender not in consent_object.gender:
+            gender_of_consent = '\' or \''.join(sorted(consent_object.gender))
+            raise ConsentImportError(
+                f'Gender of consent can only be \'{gender_of_consent}\'. '
+                f'Got \'{obj.gender}\'.')
+        years = age(obj.dob, timezone.localtime(obj.consent_datetime).date()).years
+        if years < consent_object.age_min:
+            raise ConsentImportError(
+                f'Subject\'s age is {years}. Minimum age of consent '
+                f'is {consent_object.age_min}.')
+        if years > consent_object.age_max:
+            raise ConsentImportError(
+                f'Subject\'s age is {years}. Maximum age of consent '
+                f'is {consent_object.age_max}.')
+
+    @property
+    def unique_keys(self):
+        """Returns a list of tuples of field attnames that must be
+        unique.
+
+        The fingerprint stands in for unique_together first_name,
+        dob, initials and version since encrypted fields cannot be
+        queried with `__in`.
+        """
+        unique_keys = [('subject_identifier', 'version'), ('fingerprint', 'version')]
+        for field in self.model_cls._meta.concrete_fields:
+            if (field.unique and not field.primary_key
+                    and not isinstance(field, BaseField)):
+                unique_keys.append((field.attname, ))
+        return unique_keys
+
+    def exclude_existing(self, prepared=None):
+        """Returns prepared rows, rejecting those with a unique key
+        already in the database or earlier in the batch.
+
+        Uses one query per unique key.
+        """
+        existing = {}
+        for key in self.unique_keys:
+            values = set([getattr(obj, key[0]) for _, _, obj in prepared])
+            values.discard(None)
+            existing[key] = set(self.model_cls.objects.filter(
+                **{f'{key[0]}__in': values}).values_list(*key))
+        unique = []
+        for row_number, row, obj in prepared:
+            values = {key: tuple(getattr(obj, attname) for attname in key)
+                      for key in existing}
+            duplicates = [key for key, value in values.items()
+                          if None not in value and value in existing[key]]
+            if duplicates:
+                self.reject(row_number, row, ConsentImportError(
+                    f'Consent already exists. Got {obj.subject_identifier} '
+                    f'version {obj.version} with the same '
+                    f'{", ".join(duplicates[0])}.'))
+            else:
+                for key, value in values.items():
+                    existing[key].add(value)
+                unique.append((row_number, row, obj))
+        return unique
+
+    def get_previous_consents(self, prepared=None):
+        """Returns a tuple of (prepared rows, previous consents to update).
+
+        Previous versions are looked up in one query and in earlier
+        rows of the batch. Rows without a previous version are
+        rejected.
+        """
+        updates = [obj for _, _, obj in prepared if obj.updates_versions]
+        if not updates:
+            return prepared, []
+        candidates = {}
+        versions = set()
+        for obj in updates:
+            versions.update(obj.consent_object.updates_versions)
+        for candidate in self.model_cls.objects.filter(
+                subject_identifier__in=set([obj.subject_identifier for obj in updates]),
+                version__in=versions):
+            candidates.setdefault(candidate.subject_identifier, []).append(candidate)
+        previous_consents = []
+        accepted = []
+        for row_number, row, obj in prepared:
+            if obj.updates_versions:
+                previous = [
+                    candidate for candidate in candidates.get(obj.subject_identifier, [])
+                    if candidate.version in obj.consent_object.updates_versions
+                    and candidate.identity == obj.identity]
+                if not previous:
+                    updates_versions = ', '.join(obj.consent_object.updates_versions)
+                    self.reject(row_number, row, ConsentVersionSequenceError(
+                        f'Failed to update previous version. A previous consent '
+                        f'with version in {updates_versions} '
+                        f'for {obj.subject_identifier} was not found.'))
+                    continue
+                previous_consent = sorted(previous, key=lambda x: x.version)[-1]
+                previous_consent.subject_identifier_as_pk = obj.subject_identifier_as_pk
+                previous_consent.subject_identifier_aka = obj.subject_identifier_aka
+                if not previous_consent._state.adding:
+                    previous_consents.append(previous_consent)
+            accepted.append((row_number, row, obj))
+            candidates.setdefault(obj.subject_identifier, []).append(obj)
+        return accepted, previous_consents
+
+    def reject(self, row_number=None, row=None, error=None):
+        self.rejected.append(dict(row_number=row_number, error=str(error), row=row))
+
+    def write_rejected(self, path=None):
+        """Writes rejected rows to a JSON lines file.
+        """
+        with open(path, 'w') as f:
+            for rejected in self.rejected:
+                f.write(json.dumps(rejected, default=str) + '\n')
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_cache = ContextVar('consent_lookup_cache', default=None)
+
+
+class ConsentLookupCache:
+
+    """A class to memoize, for a subject, the consent versions
+    found.
+
+    Only lookups that succeeded are memoized. For registration
+    lookups see ConsentDatetimeCache.
+    """
+
+    def __init__(self):
+        self.consented = {}
+
+    def is_consented(self, subject_identifier=None, consent_model=None,
+                     version=None):
+        return (consent_model, version) in self.consented.get(
+            subject_identifier, set())
+
+    def set_consented(self, subject_identifier=None, consent_model=None,
+                      version=None):
+        self.consented.setdefault(subject_identifier, set()).add(
+            (consent_model, version))
+
+    def invalidate(self, subject_identifier=None):
+        self.consented.pop(subject_identifier, None)
+
+
+def get_consent_lookup_cache():
+    """Returns the active ConsentLookupCache or None.
+    """
+    return _cache.get()
+
+
+@contextmanager
+def consent_lookup_cache():
+    """A context manager that activates a ConsentLookupCache for
+    the current context, i.e. thread or asyncio task.
+
+    If already active, the outer cache is reused.
+
+        with consent_lookup_cache():
+            for obj in crfs:
+                obj.save()
+    """
+    cache = get_consent_lookup_cache() or ConsentLookupCache()
+    token = _cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _cache.reset(token)
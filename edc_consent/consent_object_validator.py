@@ -2,6 +2,7 @@ from django.apps import apps as django_apps
 from django.conf import settings
 from edc_base import convert_php_dateformat
 
+from .consent_periods import ConsentPeriods
 from .exceptions import ConsentVersionSequenceError
 
 
@@ -15,38 +16,60 @@ class ConsentPeriodOverlapError(Exception):
 
 class ConsentObjectValidator:
 
+    """A class to validate a new consent object against those
+    already registered.
+
+    Consent periods and versions are kept per consent model and
+    updated by `add` so that each check is a lookup or a bisect
+    instead of a scan of all registered consents.
+    """
+
     def __init__(self, consent=None, consents=None):
-        self.consents = consents
+        self.periods = {}
+        self.versions = {}
+        for registered_consent in consents or []:
+            self.add(registered_consent)
+        if consent:
+            self.validate(consent)
+
+    def validate(self, consent=None):
         self.check_consent_period_within_study_period(consent)
         self.check_consent_period_for_overlap(consent)
         self.check_version(consent)
         self.check_updates_versions(consent)
 
+    def add(self, consent=None):
+        """Adds a validated consent object.
+        """
+        self.periods.setdefault(consent.model, ConsentPeriods()).add(consent)
+        self.versions.setdefault(consent.model, {}).setdefault(
+            consent.version, []).append(consent)
+
     def get_consents_by_model(self, model=None):
         """Returns a list of consents configured with the given
         consent model label_lower.
         """
-        return [consent for consent in self.consents if consent.model == model]
+        return list(self.periods.get(model, []))
 
     def get_consents_by_version(self, model=None, version=None):
         """Returns a list of consents of "version" configured with
         the given consent model.
         """
-        consents = self.get_consents_by_model(model=model)
-        return [consent for consent in consents if consent.version == version]
+        return list(self.versions.get(model, {}).get(version, []))
 
     def check_consent_period_for_overlap(self, new_consent=None):
         """Raises an error if consent period overlaps with an
         already registered consent object.
         """
-        for consent in self.consents:
-            if consent.model == new_consent.model:
-                if (new_consent.start <= consent.start <= new_consent.end or
-                        new_consent.start <= consent.end <= new_consent.end):
-                    raise ConsentPeriodOverlapError(
-                        f'Consent period overlaps with an already registered consent.'
-                        f'See alrwady registered consent {consent}. '
-                        f'Got {new_consent}.')
+        periods = self.periods.get(new_consent.model)
+        if periods:
+            consents = periods.overlapping(
+                start=new_consent.start, end=new_consent.end)
+            if consents:
+                raise ConsentPeriodOverlapError(
+                    f'Consent period overlaps with an already registered consent. '
+                    f'See already registered consent {consents[0]}. '
+                    f'Got {new_consent}.')
 
     def check_consent_period_within_study_period(self, new_consent=None):
         """Raises if the start or end date of the consent period
@@ -72,17 +95,16 @@ class ConsentObjectValidator:
                     f'Got {dt_label}={formatted_dt}.')
 
     def check_updates_versions(self, new_consent=None):
+        versions = self.versions.get(new_consent.model, {})
         for version in new_consent.updates_versions:
-            if not self.get_consents_by_version(
-                    model=new_consent.model, version=version):
+            if version not in versions:
                 raise ConsentVersionSequenceError(
                     f'Consent version {version} cannot be an update to version(s) '
                     f'\'{new_consent.updates_versions}\'. '
                     f'Version \'{version}\' not found for \'{new_consent.model}\'')
 
     def check_version(self, new_consent=None):
-        if self.get_consents_by_version(
-                model=new_consent.model, version=new_consent.version):
+        if new_consent.version in self.versions.get(new_consent.model, {}):
             raise ConsentVersionSequenceError(
                 'Consent version already registered. '
                 f'Version {new_consent.version}. '
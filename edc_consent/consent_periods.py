@@ -0,0 +1,169 @@
+from bisect import bisect_right
+from collections import namedtuple, OrderedDict
+from datetime import datetime, time, timedelta, timezone
+from threading import Lock
+
+
+CacheInfo = namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'generation'])
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def utc_ordinal(dt=None):
+    """Returns an aware datetime as integer microseconds since
+    the UTC epoch.
+    """
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+class ConsentPeriods:
+
+    """A list of consent objects sorted by start datetime.
+
+    Keeps a running maximum of the end datetimes so that the
+    consents covering a datetime or a range are found by bisecting
+    on start and walking back only while a period could still
+    reach the given datetime.
+
+    Datetimes are compared as the consents' precomputed UTC
+    ordinals.
+    """
+
+    def __init__(self):
+        self.consents = []
+        self.starts = []
+        self.max_ends = []
+
+    def __len__(self):
+        return len(self.consents)
+
+    def __iter__(self):
+        return iter(self.consents)
+
+    def add(self, consent=None):
+        index = bisect_right(self.starts, consent.start_ordinal)
+        self.starts.insert(index, consent.start_ordinal)
+        self.consents.insert(index, consent)
+        self.max_ends.insert(index, consent.end_ordinal)
+        for i in range(index, len(self.consents)):
+            max_end = self.consents[i].end_ordinal
+            if i > 0 and self.max_ends[i - 1] > max_end:
+                max_end = self.max_ends[i - 1]
+            self.max_ends[i] = max_end
+
+    def overlapping(self, start=None, end=None):
+        """Returns a list, ordered by start, of consents with a
+        period that overlaps with start to end, inclusive.
+        """
+        consents = []
+        start, end = utc_ordinal(start), utc_ordinal(end)
+        index = bisect_right(self.starts, end) - 1
+        while index >= 0 and self.max_ends[index] >= start:
+            if self.consents[index].end_ordinal >= start:
+                consents.append(self.consents[index])
+            index -= 1
+        consents.reverse()
+        return consents
+
+    def covering(self, report_datetime=None):
+        """Returns a list, ordered by start, of consents with a
+        period that includes report_datetime.
+        """
+        return self.overlapping(start=report_datetime, end=report_datetime)
+
+
+class ConsentPeriodIndex:
+
+    """An index of consent periods keyed by (model, group, version).
+
+    Each consent is indexed under its own model and version and
+    under `None` for either so that lookups that do not specify a
+    model or a version are also a single dictionary lookup.
+    """
+
+    def __init__(self, consents=None):
+        self.periods = {}
+        for consent in consents or []:
+            self.add(consent)
+
+    def add(self, consent=None):
+        for model in [consent.model, None]:
+            for version in [consent.version, None]:
+                key = (model, consent.group, version)
+                self.periods.setdefault(key, ConsentPeriods()).add(consent)
+
+    def get_periods(self, model=None, group=None, version=None):
+        """Returns the ConsentPeriods for the key or an empty one.
+        """
+        return self.periods.get((model, group, version)) or ConsentPeriods()
+
+    def covering(self, model=None, group=None, version=None,
+                 report_datetime=None):
+        """Returns a list of consents for the key with a period that
+        includes report_datetime.
+        """
+        return self.get_periods(
+            model=model, group=group, version=version).covering(report_datetime)
+
+
+class ConsentPeriodCache:
+
+    """An LRU cache of consents resolved from a ConsentPeriodIndex.
+
+    Entries are keyed by (model, group, version, UTC date) and hold
+    the consents with a period that overlaps that day. A hit is then
+    narrowed to the consents covering the exact datetime, so period
+    boundaries that fall within a day are still respected.
+
+    `invalidate` clears the cache and increments `generation`.
+    """
+
+    default_maxsize = 1024
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or self.default_maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize,
+                len(self._data), self.generation)
+
+    def covering(self, index=None, model=None, group=None, version=None,
+                 report_datetime=None):
+        """Returns a list of consents for the key with a period that
+        includes report_datetime.
+        """
+        day = report_datetime.astimezone(timezone.utc).date()
+        key = (model, group, version, day)
+        with self._lock:
+            generation = self.generation
+            consents = self._data.get(key)
+            if consents is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+        if consents is None:
+            consents = tuple(index.get_periods(
+                model=model, group=group, version=version).overlapping(
+                    start=datetime.combine(day, time.min, tzinfo=timezone.utc),
+                    end=datetime.combine(day, time.max, tzinfo=timezone.utc)))
+            with self._lock:
+                if generation == self.generation:
+                    self._data[key] = consents
+                    if len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+        ordinal = utc_ordinal(report_datetime)
+        return [c for c in consents if c.start_ordinal <= ordinal <= c.end_ordinal]
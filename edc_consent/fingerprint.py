@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+
+def consent_fingerprint(first_name=None, dob=None, initials=None):
+    """Returns a keyed hash of the normalized first name, dob and
+    initials of a consenting subject.
+
+    Stored on the consent model so that identity checks can query
+    an indexed column instead of decrypting rows.
+
+    Keyed on settings.EDC_CONSENT_FINGERPRINT_KEY or, if not set,
+    settings.SECRET_KEY. If the key changes, existing fingerprints
+    no longer match; recalculate them with management command
+    `backfill_consent_fingerprints --all`.
+    """
+    try:
+        dob = dob.isoformat()
+    except AttributeError:
+        dob = ''
+    value = '|'.join([
+        (first_name or '').strip().upper(), dob, (initials or '').strip().upper()])
+    key = getattr(settings, 'EDC_CONSENT_FINGERPRINT_KEY', None) or settings.SECRET_KEY
+    return salted_hmac('edc_consent.fingerprint', value, secret=key).hexdigest()
@@ -0,0 +1,148 @@
+import logging
+import socket
+import time
+
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from functools import wraps
+
+logger = logging.getLogger('edc_consent.instrumentation')
+
+
+class LoggingSink:
+
+    """Writes timings and counters to the edc_consent.instrumentation
+    logger at DEBUG level.
+    """
+
+    def timing(self, name=None, milliseconds=None):
+        logger.debug('%s: %.3fms', name, milliseconds,
+                     extra=dict(metric=name, milliseconds=milliseconds))
+
+    def incr(self, name=None, count=None):
+        logger.debug('%s: %s', name, count, extra=dict(metric=name, count=count))
+
+
+class StatsdSink:
+
+    """Sends timings and counters to a statsd-style UDP receiver.
+
+    Send errors are ignored.
+    """
+
+    def __init__(self, host=None, port=None, prefix=None):
+        self.address = (host or '127.0.0.1', port or 8125)
+        self.prefix = prefix or 'edc_consent'
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, data=None):
+        try:
+            self.socket.sendto(data.encode(), self.address)
+        except OSError:
+            pass
+
+    def timing(self, name=None, milliseconds=None):
+        self.send(f'{self.prefix}.{name}:{milliseconds:.3f}|ms')
+
+    def incr(self, name=None, count=None):
+        self.send(f'{self.prefix}.{name}:{count}|c')
+
+
+class MemorySink:
+
+    """Collects timings and counters in memory, e.g. for tests.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def timing(self, name=None, milliseconds=None):
+        self.timings.setdefault(name, []).append(milliseconds)
+
+    def incr(self, name=None, count=None):
+        self.counters.update({name: self.counters.get(name, 0) + count})
+
+    def reset(self):
+        self.timings = {}
+        self.counters = {}
+
+
+class Instrumentation:
+
+    """A class to time consent operations and count their queries.
+
+    Disabled until a sink is configured. When disabled, `timer`
+    and `timed` only check `sink` and call through.
+
+        instrumentation.configure(sink=MemorySink())
+        with instrumentation.timer('my_operation'):
+            ...
+
+    For each timed operation the sink gets a timing `<name>`, a
+    counter `<name>.calls` and a counter `<name>.queries`.
+    """
+
+    sinks = {'logging': LoggingSink, 'statsd': StatsdSink}
+
+    def __init__(self):
+        self.sink = None
+
+    @property
+    def enabled(self):
+        return self.sink is not None
+
+    def configure(self, sink=None):
+        """Sets the sink, an object with `timing` and `incr` methods,
+        or one of 'logging' or 'statsd'. None disables.
+        """
+        if sink == 'statsd':
+            sink = StatsdSink(
+                host=getattr(settings, 'EDC_CONSENT_STATSD_HOST', None),
+                port=getattr(settings, 'EDC_CONSENT_STATSD_PORT', None))
+        elif isinstance(sink, str):
+            sink = self.sinks[sink]()
+        self.sink = sink
+
+    @contextmanager
+    def timer(self, name=None):
+        sink = self.sink
+        if sink is None:
+            yield
+            return
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                yield
+        finally:
+            sink.timing(name, (time.perf_counter() - started) * 1000)
+            sink.incr(f'{name}.calls', 1)
+            sink.incr(f'{name}.queries', queries[0])
+
+    def incr(self, name=None, count=None):
+        if self.sink is not None:
+            self.sink.incr(name, 1 if count is None else count)
+
+    def timed(self, name=None):
+        """Returns a decorator that times calls to the function.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.sink is None:
+                    return func(*args, **kwargs)
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+instrumentation = Instrumentation()
+timed = instrumentation.timed
@@ -0,0 +1,69 @@
+import sys
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import color_style
+
+from ...fingerprint import consent_fingerprint
+from ...model_mixins import ConsentModelMixin
+
+style = color_style()
+
+
+class Command(BaseCommand):
+
+    help = 'Sets the fingerprint on existing consent model instances.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='models',
+            action='append',
+            help='Consent model label_lower. Default: all consent models.')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            help=('Recalculate all fingerprints, not only missing ones, '
+                  'e.g. after changing settings.EDC_CONSENT_FINGERPRINT_KEY.'))
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=500)
+
+    def handle(self, *args, **options):
+        if options.get('models'):
+            try:
+                models = [django_apps.get_model(model)
+                          for model in options.get('models')]
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+        else:
+            models = [model for model in django_apps.get_models()
+                      if issubclass(model, ConsentModelMixin)]
+        for model in models:
+            updated = self.backfill(
+                model=model, recalculate=options.get('all'),
+                batch_size=options.get('batch_size'))
+            sys.stdout.write(style.SUCCESS(
+                f'Updated {updated} {model._meta.label_lower} fingerprints.\n'))
+
+    def backfill(self, model=None, recalculate=None, batch_size=None):
+        queryset = model.objects.only('id', 'first_name', 'dob', 'initials')
+        if not recalculate:
+            queryset = queryset.filter(fingerprint__isnull=True)
+        updated = 0
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            obj.fingerprint = consent_fingerprint(
+                first_name=obj.first_name, dob=obj.dob, initials=obj.initials)
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ['fingerprint'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['fingerprint'])
+            updated += len(batch)
+        return updated
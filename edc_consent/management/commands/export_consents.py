@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...consent_exporter import ConsentExporter, ConsentExportError
+
+
+class Command(BaseCommand):
+
+    help = ('Exports a consent model to CSV or JSON lines. Encrypted fields '
+            'are masked unless listed with --decrypt.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='model',
+            required=True,
+            help='Consent model label_lower.')
+        parser.add_argument(
+            '--field',
+            dest='fields',
+            action='append',
+            help='Field to export. Default: all fields.')
+        parser.add_argument(
+            '--decrypt',
+            dest='decrypt',
+            action='append',
+            help='Encrypted field to decrypt. Default: none.')
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=ConsentExporter.formats,
+            default='csv')
+        parser.add_argument(
+            '--output',
+            dest='output',
+            help='Output file. Default: stdout')
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=500)
+
+    def handle(self, *args, **options):
+        try:
+            exporter = ConsentExporter(
+                model=options.get('model'),
+                fields=options.get('fields'),
+                decrypt=options.get('decrypt'),
+                export_format=options.get('export_format'),
+                chunk_size=options.get('chunk_size'))
+        except (LookupError, ValueError, ConsentExportError) as e:
+            raise CommandError(e)
+        if options.get('output'):
+            with open(options.get('output'), 'w', newline='') as f:
+                f.writelines(exporter.lines())
+        else:
+            sys.stdout.writelines(exporter.lines())
@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import color_style
+
+from ...consent_importer import ConsentImporter, read_rows
+
+style = color_style()
+
+
+class Command(BaseCommand):
+
+    help = 'Bulk imports consents from a CSV or JSON lines (.jsonl) file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .jsonl file')
+        parser.add_argument(
+            '--model',
+            dest='model',
+            required=True,
+            help='Consent model label_lower.')
+        parser.add_argument(
+            '--reject-file',
+            dest='reject_file',
+            help='JSON lines file for rejected rows. Default: <path>.rejected.jsonl')
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=500)
+
+    def handle(self, *args, **options):
+        try:
+            importer = ConsentImporter(
+                model=options.get('model'), batch_size=options.get('batch_size'))
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        try:
+            importer.import_rows(read_rows(options.get('path')))
+        except OSError as e:
+            raise CommandError(e)
+        finally:
+            if importer.rejected:
+                reject_file = (options.get('reject_file')
+                               or f'{options.get("path")}.rejected.jsonl')
+                importer.write_rejected(reject_file)
+                sys.stdout.write(style.WARNING(
+                    f'Rejected {len(importer.rejected)} rows. See {reject_file}.\n'))
+        sys.stdout.write(style.SUCCESS(
+            f'Created {importer.created} consents. '
+            f'Updated {importer.updated} previous consents.\n'))
@@ -0,0 +1,44 @@
+import sys
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import color_style
+
+from ...consent_coverage import rebuild_coverage
+from ...model_mixins import ConsentModelMixin
+
+style = color_style()
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuilds the consent coverage table from the consent models.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='models',
+            action='append',
+            help='Consent model label_lower. Default: all consent models.')
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=500)
+
+    def handle(self, *args, **options):
+        if options.get('models'):
+            try:
+                models = [django_apps.get_model(model)
+                          for model in options.get('models')]
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+        else:
+            models = [model for model in django_apps.get_models()
+                      if issubclass(model, ConsentModelMixin)]
+        for model in models:
+            created = rebuild_coverage(
+                model_cls=model, batch_size=options.get('batch_size'))
+            sys.stdout.write(style.SUCCESS(
+                f'Created {created} consent coverage rows '
+                f'for {model._meta.label_lower}.\n'))
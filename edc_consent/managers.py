@@ -1,5 +1,8 @@
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models import Q
 
 from .site_consents import site_consents, SiteConsentError
 
@@ -18,18 +21,25 @@ class ConsentManager(models.Manager):
         return self.filter(subject_identifier=subject_identifier).order_by(
             'consent_datetime').first()
 
-    def consent_for_period(self, subject_identifier=None, report_datetime=None):
-        """Returns a consent model instance or None.
+    def get_consent_object(self, report_datetime=None):
+        """Returns the consent object for the period or None.
+
+        Does not query the database.
         """
-        model_obj = None
         try:
-            consent_object = site_consents.get_consent_for_period(
+            return site_consents.get_consent_for_period(
                 model=self.model._meta.label_lower,
                 consent_group=self.model._meta.consent_group,
                 report_datetime=report_datetime)
         except SiteConsentError:
-            pass
-        else:
+            return None
+
+    def consent_for_period(self, subject_identifier=None, report_datetime=None):
+        """Returns a consent model instance or None.
+        """
+        model_obj = None
+        consent_object = self.get_consent_object(report_datetime)
+        if consent_object:
             try:
                 model_obj = self.get(
                     subject_identifier=subject_identifier,
@@ -37,3 +47,108 @@ class ConsentManager(models.Manager):
             except ObjectDoesNotExist:
                 pass
         return model_obj
+
+    async def aconsent_for_period(self, subject_identifier=None, report_datetime=None):
+        """Async variant of consent_for_period.
+        """
+        consent_object = self.get_consent_object(report_datetime)
+        if not consent_object:
+            return None
+        return await sync_to_async(self.filter(
+            subject_identifier=subject_identifier,
+            version=consent_object.version).first)()
+
+    def consents_for_period(self, subject_identifiers=None, report_datetime=None):
+        """Returns a dictionary of {subject_identifier: model instance}
+        for the subjects consented for the period of report_datetime.
+
+        Uses one query.
+        """
+        consent_object = self.get_consent_object(report_datetime)
+        if not consent_object:
+            return {}
+        return {
+            obj.subject_identifier: obj for obj in self.filter(
+                subject_identifier__in=list(set(subject_identifiers)),
+                version=consent_object.version)}
+
+    async def aconsents_for_period(self, subject_identifiers=None,
+                                   report_datetime=None):
+        """Async variant of consents_for_period.
+        """
+        consent_object = self.get_consent_object(report_datetime)
+        if not consent_object:
+            return {}
+        queryset = self.filter(
+            subject_identifier__in=list(set(subject_identifiers)),
+            version=consent_object.version)
+        return {
+            obj.subject_identifier: obj
+            for obj in await sync_to_async(list)(queryset)}
+
+
+class ConsentCoverageManager(models.Manager):
+
+    def covered(self, subject_identifiers=None, consent_model=None,
+                report_datetime=None):
+        """Returns a dictionary of {subject_identifier: version} for
+        the subjects covered by a consent at report_datetime.
+
+        Uses one query.
+        """
+        return dict(self.filter(
+            subject_identifier__in=list(set(subject_identifiers)),
+            consent_model=consent_model,
+            valid_from__lte=report_datetime,
+            valid_to__gte=report_datetime).values_list(
+                'subject_identifier', 'version'))
+
+    def is_covered(self, subject_identifier=None, consent_model=None,
+                   report_datetime=None):
+        return self.filter(
+            subject_identifier=subject_identifier,
+            consent_model=consent_model,
+            valid_from__lte=report_datetime,
+            valid_to__gte=report_datetime).exists()
+
+
+def prefetch_consent_for_period(objects=None, consent_model=None,
+                                report_datetime=None, to_attr=None,
+                                consent_group=None, consent_object_attr=None):
+    """Returns a list of objects, e.g. a queryset of subjects for a
+    list view, each with `to_attr` set to the consent model instance
+    for the period or None.
+
+    If report_datetime is None, each object's report_datetime is used.
+    If `consent_object_attr` is set, each object also gets the
+    consent object for the period or None.
+
+    Uses one query instead of one per object.
+    """
+    to_attr = to_attr or 'consent_for_period'
+    model_cls = django_apps.get_model(consent_model)
+    objects = list(objects)
+    for obj in objects:
+        setattr(obj, to_attr, None)
+        if consent_object_attr:
+            setattr(obj, consent_object_attr, None)
+    grouped = site_consents.group_by_consent(
+        model=consent_model,
+        consent_group=consent_group or model_cls._meta.consent_group,
+        items=[(obj, report_datetime or obj.report_datetime) for obj in objects])
+    if grouped:
+        query = Q()
+        for consent_object, version_objects in grouped.items():
+            query |= Q(subject_identifier__in=list(set(
+                [obj.subject_identifier for obj in version_objects])),
+                version=consent_object.version)
+        consents = {
+            (consent.subject_identifier, consent.version): consent
+            for consent in model_cls.consent.filter(query)}
+        for consent_object, version_objects in grouped.items():
+            for obj in version_objects:
+                setattr(obj, to_attr, consents.get(
+                    (obj.subject_identifier, consent_object.version)))
+                if consent_object_attr:
+                    setattr(obj, consent_object_attr, consent_object)
+    return objects
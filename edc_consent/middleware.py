@@ -0,0 +1,18 @@
+from .consent_lookup_cache import consent_lookup_cache
+
+
+class ConsentLookupCacheMiddleware:
+
+    """Memoizes consent lookups made by the
+    requires consent pre_save signal for the duration of a request.
+
+    Add 'edc_consent.middleware.ConsentLookupCacheMiddleware' to
+    settings.MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with consent_lookup_cache():
+            return self.get_response(request)
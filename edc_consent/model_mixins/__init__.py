@@ -1,2 +1,3 @@
+from .consent_coverage_model_mixin import ConsentCoverageModelMixin
 from .consent_model_mixin import ConsentModelMixin
 from .requires_consent_fields_model_mixin import RequiresConsentFieldsModelMixin
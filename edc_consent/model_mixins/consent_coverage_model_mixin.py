@@ -0,0 +1,39 @@
+from django.db import models
+
+from ..managers import ConsentCoverageManager
+
+
+class ConsentCoverageModelMixin(models.Model):
+
+    """A model mixin for a denormalized table of the period each
+    subject's consent covers, maintained from consent model signals
+    if settings.EDC_CONSENT_COVERAGE is True.
+
+    Declare the concrete model in your project, so that it is
+    migrated with your project, and set
+    settings.EDC_CONSENT_COVERAGE_MODEL to its label_lower.
+
+    See also management command rebuild_consent_coverage.
+    """
+
+    subject_identifier = models.CharField(max_length=50)
+
+    consent_model = models.CharField(max_length=50)
+
+    version = models.CharField(max_length=10)
+
+    valid_from = models.DateTimeField()
+
+    valid_to = models.DateTimeField()
+
+    objects = ConsentCoverageManager()
+
+    def __str__(self):
+        return f'{self.subject_identifier} {self.consent_model} v{self.version}'
+
+    class Meta:
+        abstract = True
+        unique_together = ('subject_identifier', 'consent_model', 'version')
+        indexes = [
+            models.Index(fields=[
+                'consent_model', 'subject_identifier', 'valid_from', 'valid_to'])]
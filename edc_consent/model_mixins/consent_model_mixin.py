@@ -10,6 +10,7 @@ from edc_protocol.validators import datetime_not_before_study_start
 
 from ..consent_helper import ConsentHelper
 from ..field_mixins import VerificationFieldsMixin
+from ..fingerprint import consent_fingerprint
 from ..managers import ObjectConsentManager, ConsentManager
 
 if 'consent_group' not in options.DEFAULT_NAMES:
@@ -69,6 +70,13 @@ class ConsentModelMixin(VerificationFieldsMixin, models.Model):
         editable=False,
         help_text='A unique identifier for this consent instance')
 
+    fingerprint = models.CharField(
+        max_length=64,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Keyed hash of first name, dob and initials. See consent_fingerprint.')
+
     objects = ObjectConsentManager()
 
     consent = ConsentManager()
@@ -83,8 +91,12 @@ class ConsentModelMixin(VerificationFieldsMixin, models.Model):
 
     def save(self, *args, **kwargs):
         self.report_datetime = self.consent_datetime
+        self.fingerprint = consent_fingerprint(
+            first_name=self.first_name, dob=self.dob, initials=self.initials)
+        previous_consent = self.__dict__.pop('_previous_consent', None)
         consent_helper = self.consent_helper_cls(
-            model_cls=self.__class__, update_previous=True, **self.__dict__)
+            model_cls=self.__class__, update_previous=True,
+            previous_consent=previous_consent, **self.__dict__)
         self.version = consent_helper.version
         self.updates_versions = True if consent_helper.updates_versions else False
         super().save(*args, **kwargs)
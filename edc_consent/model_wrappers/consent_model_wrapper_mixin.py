@@ -1,35 +1,81 @@
 from django.apps import apps as django_apps
-from django.core.exceptions import ObjectDoesNotExist
 from edc_base.utils import get_uuid
 
+from ..managers import prefetch_consent_for_period
 from ..site_consents import site_consents
 
 
 class ConsentModelWrapperMixin:
 
+    """A model wrapper mixin for a wrapped object with a
+    subject_identifier and report_datetime to get its consent.
+
+    `consent_relation` is the name of the reverse relation from the
+    wrapped object to the consent model. Prefetch it, e.g.
+    `prefetch_related('subjectconsent_set')`, to not query per
+    object. If None, the consent model is queried directly.
+
+    For a listboard, use `wrap_many` to fetch all consents in
+    one query.
+    """
+
     consent_model_wrapper_cls = None
+    consent_relation = 'subjectconsent_set'
+
+    @classmethod
+    def wrap_many(cls, objects=None, **kwargs):
+        """Returns a list of wrappers with the consent model
+        instances for all objects fetched in one query.
+
+        See prefetch_consent_for_period.
+        """
+        objects = prefetch_consent_for_period(
+            objects=objects,
+            consent_model=cls.consent_model_wrapper_cls.model,
+            consent_group=django_apps.get_app_config(
+                'edc_consent').default_consent_group,
+            to_attr='_prefetched_consent_model_obj',
+            consent_object_attr='_prefetched_consent_object')
+        wrappers = []
+        for obj in objects:
+            wrapper = cls(model_obj=obj, **kwargs)
+            if obj._prefetched_consent_object:
+                wrapper._consent_object = obj._prefetched_consent_object
+                wrapper._consent_model_obj = obj._prefetched_consent_model_obj
+                wrapper._consent_model_obj_fetched = True
+            wrappers.append(wrapper)
+        return wrappers
 
     @property
     def consent_object(self):
         """Returns a consent configuration object from site_consents
         relative to the wrapper's "object" report_datetime.
         """
-        default_consent_group = django_apps.get_app_config(
-            'edc_consent').default_consent_group
-        consent_object = site_consents.get_consent_for_period(
-            model=self.consent_model_wrapper_cls.model,
-            report_datetime=self.object.report_datetime,
-            consent_group=default_consent_group)
-        return consent_object
+        if not getattr(self, '_consent_object', None):
+            default_consent_group = django_apps.get_app_config(
+                'edc_consent').default_consent_group
+            self._consent_object = site_consents.get_consent_for_period(
+                model=self.consent_model_wrapper_cls.model,
+                report_datetime=self.object.report_datetime,
+                consent_group=default_consent_group)
+        return self._consent_object
 
     @property
     def consent_model_obj(self):
         """Returns a consent model instance or None.
         """
-        try:
-            return self.object.subjectconsent_set.get(**self.consent_options)
-        except ObjectDoesNotExist:
-            return None
+        if not getattr(self, '_consent_model_obj_fetched', False):
+            options = self.consent_options
+            if self.consent_relation:
+                consents = [
+                    obj for obj in getattr(self.object, self.consent_relation).all()
+                    if all([getattr(obj, k) == v for k, v in options.items()])]
+                self._consent_model_obj = consents[0] if consents else None
+            else:
+                self._consent_model_obj = self.consent_object.model_cls.objects.filter(
+                    **options).first()
+            self._consent_model_obj_fetched = True
+        return self._consent_model_obj
 
     @property
     def consent(self):
@@ -1,5 +1,6 @@
 from dateutil.relativedelta import relativedelta
 from django import forms
+from django.db.models import Q
 from django.forms.utils import ErrorList
 from django.utils import timezone
 from edc_base.utils import formatted_age, age
@@ -7,7 +8,9 @@ from edc_constants.constants import YES, NO
 from edc_registration.models import RegisteredSubject
 
 from ..consent_helper import ConsentHelper
-from ..exceptions import ConsentObjectDoesNotExist
+from ..exceptions import ConsentObjectDoesNotExist, ConsentVersionSequenceError
+from ..fingerprint import consent_fingerprint
+from ..instrumentation import instrumentation
 from ..site_consents import site_consents, SiteConsentError
 
 
@@ -20,44 +23,81 @@ class ConsentModelFormMixin:
         help_text="Retype the identity number")
 
     def clean(self):
-        cleaned_data = super().clean()
-        self.clean_initials_with_full_name()
-        self.clean_gender_of_consent()
-        self.clean_is_literate_and_witness()
-        self.clean_dob_relative_to_consent_datetime()
-        self.clean_guardian_and_dob()
-        self.clean_identity_and_confirm_identity()
-        self.clean_identity_with_unique_fields()
-        self.clean_with_registered_subject()
+        """Runs the consent validation in one pass, adding all
+        errors to the form instead of stopping at the first.
 
-        consent_datetime = self.cleaned_data.get(
-            'consent_datetime') or self.instance.consent_datetime
-        if consent_datetime:
-            options = dict(
-                consent_model=self._meta.model._meta.label_lower,
-                consent_group=self._meta.model._meta.consent_group,
-                report_datetime=consent_datetime)
-            consent = site_consents.get_consent(**options)
-            if consent.updates_versions:
-                ConsentHelper(
-                    model_cls=self._meta.model,
-                    update_previous=False,
-                    **self.cleaned_data)
+        The consent object and the age are resolved once per clean.
+        Checks that depend on the consent object are skipped if it
+        cannot be resolved.
+        """
+        cleaned_data = super().clean()
+        self._consent_config = None
+        self._age = None
+        errors = []
+        clean_methods = [
+            self.clean_initials_with_full_name,
+            self.clean_is_literate_and_witness,
+            self.clean_identity_and_confirm_identity,
+            self.clean_identity_with_unique_fields,
+            self.clean_with_registered_subject]
+        if not self.consent_datetime:
+            clean_methods.append(self.clean_dob_relative_to_consent_datetime)
+        else:
+            try:
+                self.consent_config
+            except forms.ValidationError as e:
+                errors.append(e)
+            else:
+                clean_methods.extend([
+                    self.clean_gender_of_consent,
+                    self.clean_dob_relative_to_consent_datetime,
+                    self.clean_guardian_and_dob,
+                    self.clean_previous_consent])
+        for clean_method in clean_methods:
+            try:
+                with instrumentation.timer(f'consent_form.{clean_method.__name__}'):
+                    clean_method()
+            except forms.ValidationError as e:
+                errors.append(e)
+        for error in errors:
+            self.add_error(None, error)
         return cleaned_data
 
+    @property
+    def consent_datetime(self):
+        return (self.cleaned_data.get('consent_datetime')
+                or self.instance.consent_datetime)
+
     @property
     def consent_config(self):
-        cleaned_data = self.cleaned_data
-        try:
-            consent_config = site_consents.get_consent(
-                report_datetime=cleaned_data.get(
-                    'consent_datetime') or self.instance.consent_datetime,
-                consent_model=self._meta.model._meta.label_lower,
-                consent_group=self._meta.model._meta.consent_group
-            )
-        except (ConsentObjectDoesNotExist, SiteConsentError) as e:
-            raise forms.ValidationError(e)
-        return consent_config
+        """Returns the consent object for the consent datetime,
+        resolved once per clean.
+        """
+        if not getattr(self, '_consent_config', None):
+            try:
+                self._consent_config = site_consents.get_consent(
+                    report_datetime=self.consent_datetime,
+                    model=self._meta.model._meta.label_lower,
+                    consent_group=self._meta.model._meta.consent_group)
+            except (ConsentObjectDoesNotExist, SiteConsentError) as e:
+                raise forms.ValidationError(e)
+        return self._consent_config
+
+    def clean_previous_consent(self):
+        """Validates the version sequence if this consent updates
+        a previous version.
+
+        The previous consent is kept on the instance for save().
+        """
+        if self.consent_config.updates_versions:
+            consent_helper = ConsentHelper(
+                model_cls=self._meta.model,
+                update_previous=False,
+                **self.cleaned_data)
+            try:
+                self.instance._previous_consent = consent_helper.previous_consent
+            except ConsentVersionSequenceError as e:
+                raise forms.ValidationError(e)
 
     def clean_with_registered_subject(self):
         cleaned_data = self.cleaned_data
@@ -84,27 +124,37 @@ class ConsentModelFormMixin:
                 f'the confirmation field. Got {identity} != {confirm_identity}'})
 
     def clean_identity_with_unique_fields(self):
+        """Validates the identity is not in use by another subject
+        and was not previously reported differently for this subject.
+
+        Uses one query on identity and the indexed fingerprint
+        column. Rows without a fingerprint, i.e. not yet backfilled,
+        with the same dob are compared on the decrypted values, see
+        management command `backfill_consent_fingerprints`.
+        """
         cleaned_data = self.cleaned_data
         identity = cleaned_data.get('identity')
-        first_name = cleaned_data.get('first_name')
-        initials = cleaned_data.get('initials')
-        dob = cleaned_data.get('dob')
-        unique_together_form = self.unique_together_string(
-            first_name, initials, dob)
-        for consent in self._meta.model.objects.filter(
-                identity=identity):
-            unique_together_model = self.unique_together_string(
-                consent.first_name, consent.initials, consent.dob)
-            if unique_together_form != unique_together_model:
+        fingerprint = consent_fingerprint(
+            first_name=cleaned_data.get('first_name'),
+            dob=cleaned_data.get('dob'),
+            initials=cleaned_data.get('initials'))
+        conflicts = self._meta.model.objects.filter(
+            (Q(identity=identity) & ~Q(fingerprint=fingerprint))
+            | ((Q(fingerprint=fingerprint)
+                | Q(fingerprint__isnull=True, dob=cleaned_data.get('dob')))
+               & ~Q(identity=identity)))
+        for consent in conflicts:
+            existing_fingerprint = consent.fingerprint or consent_fingerprint(
+                first_name=consent.first_name, dob=consent.dob,
+                initials=consent.initials)
+            if consent.identity == identity and existing_fingerprint != fingerprint:
                 raise forms.ValidationError(
                     {'identity': 'Identity \'{}\' is already in use by another '
                      'subject. See {}.'.format(identity, consent.subject_identifier)})
-        for consent in self._meta.model.objects.filter(
-                first_name=first_name, initials=initials, dob=dob):
-            if consent.identity != identity:
+            elif consent.identity != identity and existing_fingerprint == fingerprint:
                 raise forms.ValidationError({
                     'identity': 'Subject\'s identity was previously reported '
-                    'as \'{}\'.'.format(consent.identity, identity)})
+                    'as \'{}\'.'.format(consent.identity)})
 
     # ok
     def clean_initials_with_full_name(self):
@@ -131,8 +181,10 @@ class ConsentModelFormMixin:
         cleaned_data = self.cleaned_data
         guardian = cleaned_data.get("guardian_name")
         dob = cleaned_data.get('dob')
-        consent_datetime = timezone.localtime(
-            cleaned_data.get('consent_datetime', self.instance.consent_datetime))
+        if not self.consent_datetime or not dob:
+            return
+        # on the local date, not the date in UTC as in self.age
+        consent_datetime = timezone.localtime(self.consent_datetime)
         rdelta = relativedelta(consent_datetime.date(), dob)
         if rdelta.years < self.consent_config.age_is_adult:
             if not guardian:
@@ -156,28 +208,25 @@ class ConsentModelFormMixin:
         """Validates that the dob is within the bounds of MIN and
         MAX set on the model.
         """
-        cleaned_data = self.cleaned_data
-        consent_datetime = cleaned_data.get(
-            'consent_datetime', self.instance.consent_datetime)
-        if not consent_datetime:
+        if not self.consent_datetime:
             self._errors["consent_datetime"] = ErrorList(
                 [u"This field is required. Please fill consent date and time."])
             raise forms.ValidationError('Please correct the errors below.')
-
-        if consent_datetime:
-            age
-
         self.validate_min_age()
         self.validate_max_age()
 
     @property
     def age(self):
-        consent_datetime = self.cleaned_data.get(
-            'consent_datetime', self.instance.consent_datetime)
-        dob = self.cleaned_data.get('dob')
-        if consent_datetime and dob:
-            return age(dob, consent_datetime.date())
-        return None
+        """Returns the age at consent as a relativedelta, computed
+        once per clean, or None.
+        """
+        if not getattr(self, '_age', None):
+            consent_datetime = self.consent_datetime
+            dob = self.cleaned_data.get('dob')
+            self._age = None
+            if consent_datetime and dob:
+                self._age = age(dob, consent_datetime.date())
+        return self._age
 
     def validate_min_age(self):
         if self.age:
@@ -264,7 +313,7 @@ class ConsentModelFormMixin:
                 'Gender of consent can only be \'%(gender_of_consent)s\'. '
                 'Got \'%(gender)s\'.',
                 params={'gender_of_consent': '\' or \''.join(
-                    self.consent_config.gender), 'gender': gender},
+                    sorted(self.consent_config.gender)), 'gender': gender},
                 code='invalid')
         return gender
 
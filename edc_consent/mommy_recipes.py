@@ -5,7 +5,7 @@ from edc_constants.constants import YES, MALE, NO
 from faker import Faker
 from model_mommy.recipe import Recipe, seq
 
-from .tests.models import SubjectConsent
+from .tests.models import SubjectConsent, SubjectConsentWithHistory
 
 fake = Faker()
 
@@ -34,3 +34,6 @@ subjectconsent = Recipe(
     consent_signature=YES,
     site=Site.objects.get_current(),
 )
+
+subjectconsentwithhistory = Recipe(
+    SubjectConsentWithHistory, **subjectconsent.attr_mapping)
@@ -1,15 +1,17 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
 from edc_base import convert_php_dateformat
 
+from .consent_lookup_cache import get_consent_lookup_cache
 from .exceptions import NotConsentedError
+from .instrumentation import timed
 from .site_consents import site_consents, SiteConsentError
 
 
 class RequiresConsent:
 
     def __init__(self, model=None, subject_identifier=None, report_datetime=None,
-                 consent_model=None, consent_group=None):
+                 consent_model=None, consent_group=None, check=None):
 
         self.version = None
         self.model = model
@@ -26,18 +28,90 @@ class RequiresConsent:
             raise SiteConsentError(
                 f'Cannot lookup {self.consent_model} instance for subject. '
                 f'Got \'subject_identifier\' is None.')
-        self.consented_or_raise()
+        if check is None or check:
+            self.consented_or_raise()
 
+    @property
+    def lookup_cache_options(self):
+        return dict(
+            subject_identifier=self.subject_identifier,
+            consent_model=self.consent_model,
+            version=self.version)
+
+    @property
+    def consent_queryset(self):
+        return self.consent_model_cls.objects.filter(
+            subject_identifier=self.subject_identifier,
+            version=self.version)
+
+    @timed('requires_consent.consented_or_raise')
     def consented_or_raise(self):
-        try:
-            self.consent_model_cls.objects.get(
-                subject_identifier=self.subject_identifier,
-                version=self.version)
-        except ObjectDoesNotExist:
-            formatted_report_datetime = self.report_datetime.strftime(
-                convert_php_dateformat(settings.SHORT_DATE_FORMAT))
-            raise NotConsentedError(
-                f'Consent is required. Cannot find \'{self.consent_model} '
-                f'version {self.version}\' when saving model \'{self.model}\' for '
-                f'subject \'{self.subject_identifier}\' with date '
-                f'\'{formatted_report_datetime}\' .')
+        cache = get_consent_lookup_cache()
+        if cache and cache.is_consented(**self.lookup_cache_options):
+            return
+        if not self.consent_queryset.exists():
+            self.raise_not_consented()
+        if cache:
+            cache.set_consented(**self.lookup_cache_options)
+
+    async def aconsented_or_raise(self):
+        """Async variant of consented_or_raise.
+        """
+        cache = get_consent_lookup_cache()
+        if cache and cache.is_consented(**self.lookup_cache_options):
+            return
+        if not await sync_to_async(self.consent_queryset.exists)():
+            self.raise_not_consented()
+        if cache:
+            cache.set_consented(**self.lookup_cache_options)
+
+    def raise_not_consented(self):
+        formatted_report_datetime = self.report_datetime.strftime(
+            convert_php_dateformat(settings.SHORT_DATE_FORMAT))
+        raise NotConsentedError(
+            f'Consent is required. Cannot find \'{self.consent_model} '
+            f'version {self.version}\' when saving model \'{self.model}\' for '
+            f'subject \'{self.subject_identifier}\' with date '
+            f'\'{formatted_report_datetime}\' .')
+
+    @classmethod
+    def check_many(cls, instances=None, consent_model=None, consent_group=None):
+        """Returns a list of the model instances that are not covered
+        by a consent instead of raising on the first.
+
+        For bulk loads that bypass the pre_save signal. Sets
+        `consent_version` on each covered instance.
+        """
+        instances = list(instances)
+        coverage = site_consents.verify_coverage(
+            consent_model=consent_model,
+            consent_group=consent_group,
+            subjects=[(obj.subject_identifier, obj.report_datetime)
+                      for obj in instances])
+        uncovered = []
+        for obj in instances:
+            version = coverage.get((obj.subject_identifier, obj.report_datetime))
+            if version:
+                obj.consent_version = version
+            else:
+                uncovered.append(obj)
+        return uncovered
+
+
+async def arequires_consent(model=None, subject_identifier=None, report_datetime=None,
+                            consent_model=None, consent_group=None):
+    """Async variant of RequiresConsent for async views.
+
+    Returns the RequiresConsent instance or raises NotConsentedError.
+    The site_consents lookup runs in the event loop; only the
+    consent model query runs in a thread.
+    """
+    requires_consent = RequiresConsent(
+        model=model,
+        subject_identifier=subject_identifier,
+        report_datetime=report_datetime,
+        consent_model=consent_model,
+        consent_group=consent_group,
+        check=False)
+    await requires_consent.aconsented_or_raise()
+    return requires_consent
@@ -83,12 +83,25 @@ WSGI_APPLICATION = 'edc_consent.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/1.10/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+if os.environ.get('EDC_CONSENT_DB_ENGINE') == 'postgresql':
+    # e.g. for benchmarks against a local Postgres
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('EDC_CONSENT_DB_NAME', 'edc_consent'),
+            'USER': os.environ.get('EDC_CONSENT_DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('EDC_CONSENT_DB_PASSWORD', ''),
+            'HOST': os.environ.get('EDC_CONSENT_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('EDC_CONSENT_DB_PORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
     }
-}
 
 
 # Password validation
@@ -137,6 +150,8 @@ DASHBOARD_URL_NAMES = {
     'subject_dashboard_url': 'edc_subject_dashboard:subject_dashboard_url',
 }
 
+EDC_CONSENT_COVERAGE_MODEL = 'edc_consent.consentcoverage'
+
 if 'test' in sys.argv:
 
     class DisableMigrations:
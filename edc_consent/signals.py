@@ -1,15 +1,29 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models.signals import pre_save
-from django.dispatch import receiver
+import logging
+
+from django.apps import apps as django_apps
+from django.db.models.signals import pre_save, post_save, post_delete
+from functools import wraps
 from edc_consent.exceptions import NotConsentedError
 from edc_registration.models import RegisteredSubject
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
+from .consent_coverage import coverage_enabled, update_coverage, delete_coverage
+from .consent_datetime_cache import consent_datetime_cache
+from .consent_lookup_cache import get_consent_lookup_cache
+from .model_mixins import ConsentModelMixin
 from .requires_consent import RequiresConsent
 
+logger = logging.getLogger(__name__)
+
+_requires_consent_senders = {}
+
 
-@receiver(pre_save, weak=False, dispatch_uid='requires_consent_on_pre_save')
 def requires_consent_on_pre_save(instance, raw, **kwargs):
+    """Checks a post-consent model instance is covered by a consent
+    or a subject registration.
+
+    Connected per sender, see sync_requires_consent_signals.
+    """
     if not raw:
         try:
             consent_model = site_visit_schedules.all_post_consent_models[
@@ -24,14 +38,146 @@ def requires_consent_on_pre_save(instance, raw, **kwargs):
                     report_datetime=instance.report_datetime,
                     consent_model=consent_model)
                 instance.consent_version = requires_consent.version
-            else:
-                try:
-                    RegisteredSubject.objects.get(
-                        subject_identifier=instance.subject_identifier,
-                        consent_datetime__lte=instance.report_datetime)
-                except ObjectDoesNotExist:
-                    raise NotConsentedError(
-                        f'Subject is not registered. Unable to save '
-                        f'{instance._meta.label_lower}. '
-                        f'Got {instance.subject_identifier} on '
-                        f'{instance.report_datetime}.')
+            elif not consent_datetime_cache.is_registered(
+                    subject_identifier=instance.subject_identifier,
+                    report_datetime=instance.report_datetime):
+                raise NotConsentedError(
+                    f'Subject is not registered. Unable to save '
+                    f'{instance._meta.label_lower}. '
+                    f'Got {instance.subject_identifier} on '
+                    f'{instance.report_datetime}.')
+
+
+def sync_requires_consent_signals():
+    """Connects requires_consent_on_pre_save to pre_save for each
+    post-consent model in site_visit_schedules and disconnects it
+    from models no longer listed. Returns a list of the connected
+    model label_lowers.
+
+    Labels of models that are not installed are logged and
+    skipped.
+
+    Called in AppConfig.ready() and after each call to
+    site_visit_schedules.register, see connect_site_visit_schedules.
+    Call it directly if post-consent models change in some other way.
+    """
+    labels = set(site_visit_schedules.all_post_consent_models)
+    for label in list(_requires_consent_senders):
+        if label not in labels:
+            pre_save.disconnect(
+                sender=_requires_consent_senders.pop(label),
+                dispatch_uid=f'requires_consent_on_pre_save.{label}')
+    for label in labels:
+        if label not in _requires_consent_senders:
+            try:
+                model_cls = django_apps.get_model(label)
+            except (LookupError, ValueError):
+                logger.warning(
+                    f'Post-consent model not found. Not checking consent '
+                    f'on pre_save. Got {label}.')
+                continue
+            pre_save.connect(
+                requires_consent_on_pre_save, sender=model_cls, weak=False,
+                dispatch_uid=f'requires_consent_on_pre_save.{label}')
+            _requires_consent_senders[label] = model_cls
+    return sorted(_requires_consent_senders)
+
+
+def connect_site_visit_schedules():
+    """Wraps site_visit_schedules.register to call
+    sync_requires_consent_signals after each registration.
+
+    This is the supported way to keep the pre_save checks in sync
+    with the visit schedules. Visit schedules registered after
+    AppConfig.ready(), e.g. if edc_visit_schedule is listed after
+    edc_consent in INSTALLED_APPS or in a test setUp, are then
+    still checked on pre_save. Only `register` is wrapped; if the
+    registry is changed directly, call sync_requires_consent_signals.
+
+    Called once in AppConfig.ready(). Calling it again does nothing.
+    """
+    register = site_visit_schedules.register
+    if getattr(register, 'syncs_requires_consent_signals', False):
+        return
+
+    @wraps(register)
+    def register_and_sync(*args, **kwargs):
+        value = register(*args, **kwargs)
+        sync_requires_consent_signals()
+        return value
+
+    register_and_sync.syncs_requires_consent_signals = True
+    site_visit_schedules.register = register_and_sync
+
+
+def consent_lookup_cache_on_post_save(instance, raw, **kwargs):
+    """Invalidates the subject's entries in the active consent lookup
+    cache and the consent datetime cache when a consent or
+    registered subject is saved.
+
+    Connected per sender, see connect_consent_model_signals.
+    """
+    consent_datetime_cache.invalidate(instance.subject_identifier)
+    cache = get_consent_lookup_cache()
+    if cache:
+        cache.invalidate(instance.subject_identifier)
+
+
+def consent_lookup_cache_on_post_delete(instance, **kwargs):
+    """Invalidates the subject's entries in the active consent lookup
+    cache and the consent datetime cache when a consent or
+    registered subject is deleted.
+
+    Connected per sender, see connect_consent_model_signals.
+    """
+    consent_datetime_cache.invalidate(instance.subject_identifier)
+    cache = get_consent_lookup_cache()
+    if cache:
+        cache.invalidate(instance.subject_identifier)
+
+
+def connect_consent_model_signals():
+    """Connects the post_save and post_delete handlers to
+    RegisteredSubject and each consent model, i.e. each model
+    using ConsentModelMixin. Returns a list of the connected model
+    label_lowers.
+
+    Called in AppConfig.ready().
+    """
+    senders = [RegisteredSubject] + [
+        model for model in django_apps.get_models()
+        if issubclass(model, ConsentModelMixin)]
+    for sender in senders:
+        label = sender._meta.label_lower
+        post_save.connect(
+            consent_lookup_cache_on_post_save, sender=sender, weak=False,
+            dispatch_uid=f'consent_lookup_cache_on_post_save.{label}')
+        post_delete.connect(
+            consent_lookup_cache_on_post_delete, sender=sender, weak=False,
+            dispatch_uid=f'consent_lookup_cache_on_post_delete.{label}')
+        if issubclass(sender, ConsentModelMixin):
+            post_save.connect(
+                consent_coverage_on_post_save, sender=sender, weak=False,
+                dispatch_uid=f'consent_coverage_on_post_save.{label}')
+            post_delete.connect(
+                consent_coverage_on_post_delete, sender=sender, weak=False,
+                dispatch_uid=f'consent_coverage_on_post_delete.{label}')
+    return sorted([sender._meta.label_lower for sender in senders])
+
+
+def consent_coverage_on_post_save(instance, raw, **kwargs):
+    """Updates the subject's consent coverage when a consent is saved.
+
+    Connected per consent model, see connect_consent_model_signals.
+    """
+    if coverage_enabled():
+        update_coverage([instance])
+
+
+def consent_coverage_on_post_delete(instance, **kwargs):
+    """Deletes the subject's consent coverage when a consent is deleted.
+
+    Connected per consent model, see connect_consent_model_signals.
+    """
+    if coverage_enabled():
+        delete_coverage(instance)
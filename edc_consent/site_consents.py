@@ -1,14 +1,27 @@
+import logging
 import sys
+import time
 
-from copy import deepcopy
+from collections import namedtuple
 from django.apps import apps as django_apps
 from django.conf import settings
 from django.core.management.color import color_style
-from django.utils.module_loading import import_module, module_has_submodule
+from django.utils.module_loading import import_module
+from importlib.util import find_spec
+from threading import RLock
 from edc_base.utils import convert_php_dateformat
 
 from .exceptions import ConsentObjectDoesNotExist
 from .consent_object_validator import ConsentObjectValidator
+from .consent_periods import ConsentPeriodIndex, ConsentPeriodCache
+from .instrumentation import timed
+
+
+logger = logging.getLogger(__name__)
+
+ConsentsSnapshot = namedtuple(
+    'ConsentsSnapshot',
+    ['generation', 'consents', 'by_model', 'by_group', 'by_version'])
 
 
 class ConsentError(Exception):
@@ -26,86 +39,153 @@ class SiteConsentError(Exception):
 class SiteConsents:
 
     validator_cls = ConsentObjectValidator
+    index_cls = ConsentPeriodIndex
+    cache_cls = ConsentPeriodCache
 
     def __init__(self):
+        self.cache = self.cache_cls()
+        self._snapshot = None
+        self._autodiscover_options = None
+        self._autodiscover_lock = RLock()
+        self._loading = False
+        self.import_durations = {}
         self.registry = {}
 
+    @property
+    def registry(self):
+        self.ensure_loaded()
+        return self._registry
+
+    @registry.setter
+    def registry(self, registry):
+        """Sets the registry, rebuilds the validator and consent
+        period index and invalidates the cache.
+        """
+        self._registry = registry
+        self.consent_object_validator = self.validator_cls(
+            consents=registry.values())
+        self.index = self.index_cls(consents=registry.values())
+        self.cache.invalidate()
+
+    @property
+    def generation(self):
+        """Returns the registry generation, incremented each time
+        the registry changes.
+        """
+        return self.cache.generation
+
+    def cache_info(self):
+        """Returns a named tuple of hits, misses, maxsize, currsize
+        and generation for the consent lookup cache.
+        """
+        return self.cache.info()
+
     def register(self, consent=None):
         if consent.name in self.registry:
             raise AlreadyRegistered(
                 f'Consent object already registered. Got {consent}.')
-        self.consent_object_validator = self.validator_cls(
-            consent=consent, consents=self.consents)
+        self.consent_object_validator.validate(consent)
         self.registry.update({consent.name: consent})
+        self.consent_object_validator.add(consent)
+        self.index.add(consent)
+        self.cache.invalidate()
+
+    @property
+    def snapshot(self):
+        """Returns a ConsentsSnapshot of the registry, rebuilt only
+        if the registry has changed.
+        """
+        snapshot = self._snapshot
+        generation = self.generation
+        if not snapshot or snapshot.generation != generation:
+            consents = tuple(sorted(self.registry.values(), key=lambda x: x.name))
+            by_model, by_group, by_version = {}, {}, {}
+            for consent in consents:
+                by_model.setdefault(consent.model, []).append(consent)
+                by_group.setdefault(consent.group, []).append(consent)
+                by_version.setdefault(consent.version, []).append(consent)
+            snapshot = ConsentsSnapshot(
+                generation=generation,
+                consents=consents,
+                by_model={k: tuple(v) for k, v in by_model.items()},
+                by_group={k: tuple(v) for k, v in by_group.items()},
+                by_version={k: tuple(v) for k, v in by_version.items()})
+            self._snapshot = snapshot
+        return snapshot
 
     @property
     def consents(self):
-        """Returns an ordered list of consent objects.
+        """Returns an ordered tuple of consent objects.
         """
-        consents = list(self.registry.values())
-        return sorted(consents, key=lambda x: x.name, reverse=False)
+        return self.snapshot.consents
 
     def get_consents_by_model(self, model=None):
-        """Returns a list of consents for the given
+        """Returns a tuple of consents for the given
         consent model label_lower.
         """
-        return [consent for consent in self.consents if consent.model == model]
+        return self.snapshot.by_model.get(model, ())
+
+    def get_consents_by_group(self, consent_group=None):
+        """Returns a tuple of consents for the given consent group.
+        """
+        return self.snapshot.by_group.get(consent_group, ())
+
+    def get_consents_by_version(self, version=None):
+        """Returns a tuple of consents for the given version.
+        """
+        return self.snapshot.by_version.get(version, ())
 
+    @timed('site_consents.get_consent_for_period')
     def get_consent_for_period(self, model=None, report_datetime=None,
                                consent_group=None):
         """Returns a consent object with a date range that the
         given report_datetime falls within.
         """
+        self.ensure_loaded()
         app_config = django_apps.get_app_config('edc_consent')
         consent_group = consent_group or app_config.default_consent_group
-        registered_consents = self.registry.values()
-        registered_consents = [
-            c for c in registered_consents
-            if c.group == consent_group and c.model == model]
-        if not registered_consents:
+        periods = self.index.get_periods(model=model, group=consent_group)
+        if not periods:
             raise SiteConsentError(
                 f'No matching registered consent object in site consents. '
                 f'Got consent_model={model}, consent_group={consent_group}. '
                 f'Expected one of {self.consents}.')
-        registered_consents = [
-            c for c in registered_consents if c.start <= report_datetime <= c.end]
+        registered_consents = self.cache.covering(
+            index=self.index, model=model, group=consent_group,
+            report_datetime=report_datetime)
         if not registered_consents:
             raise SiteConsentError(
                 f'Date does not fall within the period of any registered consent '
                 f'object. Got {report_datetime}. Expected one of {self.consents}.')
         return registered_consents[0]
 
+    @timed('site_consents.get_consent')
     def get_consent(self, model=None, report_datetime=None,
                     version=None, consent_group=None, **kwargs):
         """Return consent object valid for the datetime.
         """
+        self.ensure_loaded()
         app_config = django_apps.get_app_config('edc_consent')
         consent_group = consent_group or app_config.default_consent_group
-        registered_consents = self.registry.values()
-        if consent_group:
-            registered_consents = [
-                c for c in registered_consents if c.group == consent_group]
-        if not registered_consents:
+        if not self.index.get_periods(group=consent_group):
             raise ConsentObjectDoesNotExist(
                 f'No matching consent in site consents. '
                 f'Got consent_group={consent_group}.')
-        if version:
-            registered_consents = [
-                c for c in registered_consents if c.version == version]
-        if not registered_consents:
+        if version and not self.index.get_periods(
+                group=consent_group, version=version):
             raise ConsentObjectDoesNotExist(
                 f'No matching consent in site consents. '
                 f'Got consent_group={consent_group}, version={version}.')
-        if model:
-            registered_consents = [
-                c for c in registered_consents if c.model == model]
-        if not registered_consents:
+        periods = self.index.get_periods(
+            model=model, group=consent_group, version=version)
+        if model and not periods:
             raise ConsentObjectDoesNotExist(
                 f'No matching consent in site consents. '
                 f'Got consent_group={consent_group}, version={version}, '
                 f'model={model}.')
-        registered_consents = [
-            c for c in registered_consents if c.start <= report_datetime <= c.end]
+        registered_consents = self.cache.covering(
+            index=self.index, model=model, group=consent_group,
+            version=version, report_datetime=report_datetime)
         if not registered_consents:
             raise ConsentObjectDoesNotExist(
                 f'No matching consent in site consents. '
@@ -122,32 +202,134 @@ class SiteConsents:
                 f'Got {consents}')
         return registered_consents[0]
 
+    def group_by_consent(self, model=None, consent_group=None, items=None):
+        """Returns a dictionary of {consent object: [item, ...]} for
+        an iterable of (item, report_datetime) pairs.
+
+        Items without a consent object for the period of
+        report_datetime are left out. Does not query the database.
+        """
+        grouped = {}
+        for item, report_datetime in items:
+            try:
+                consent_object = self.get_consent_for_period(
+                    model=model,
+                    consent_group=consent_group,
+                    report_datetime=report_datetime)
+            except SiteConsentError:
+                continue
+            grouped.setdefault(consent_object, []).append(item)
+        return grouped
+
+    def verify_coverage(self, consent_model=None, consent_group=None,
+                        subjects=None, chunk_size=None):
+        """Returns a dictionary of {(subject_identifier, report_datetime):
+        version} for an iterable of (subject_identifier, report_datetime)
+        pairs where version is None if the subject is not consented
+        for the period of report_datetime.
+
+        Consent versions are resolved from the registry and the
+        consent model is queried once per version (and chunk).
+        """
+        chunk_size = chunk_size or 500
+        coverage = {pair: None for pair in subjects}
+        grouped = self.group_by_consent(
+            model=consent_model,
+            consent_group=consent_group,
+            items=[(pair, pair[1]) for pair in coverage if pair[0]])
+        model_cls = django_apps.get_model(consent_model)
+        for consent_object, pairs in grouped.items():
+            version = consent_object.version
+            subject_identifiers = list(set([pair[0] for pair in pairs]))
+            consented = set()
+            for i in range(0, len(subject_identifiers), chunk_size):
+                consented.update(model_cls.objects.filter(
+                    subject_identifier__in=subject_identifiers[i:i + chunk_size],
+                    version=version).values_list('subject_identifier', flat=True))
+            for pair in pairs:
+                if pair[0] in consented:
+                    coverage.update({pair: version})
+        return coverage
+
+    def defer_autodiscover(self, **kwargs):
+        """Defers autodiscover until the registry is first accessed
+        or `ensure_loaded` is called.
+
+        kwargs are passed to autodiscover.
+        """
+        with self._autodiscover_lock:
+            self._autodiscover_options = kwargs
+
+    def ensure_loaded(self):
+        """Runs a deferred autodiscover, once, if there is one.
+
+        Other threads wait until autodiscover has finished. Accessing
+        the registry while autodiscover is running in this thread,
+        e.g. from register(), does not start it again.
+        """
+        if self._autodiscover_options is not None:
+            with self._autodiscover_lock:
+                options = self._autodiscover_options
+                if options is not None and not self._loading:
+                    self._loading = True
+                    try:
+                        self.autodiscover(**options)
+                        self._autodiscover_options = None
+                    finally:
+                        self._loading = False
+
     def autodiscover(self, module_name=None, verbose=True):
         """Autodiscovers consent classes in the consents.py file of
         any INSTALLED_APP.
+
+        Only apps with a `module_name` submodule are imported. If the
+        import fails, consents registered by that module are rolled
+        back before raising.
+
+        Logs one record with the discovered consents, the time spent
+        and the import duration per app in `extra`.
         """
         module_name = module_name or 'consents'
         writer = sys.stdout.write if verbose else lambda x: x
         style = color_style()
         writer(f' * checking for site {module_name} ...\n')
-        for app in django_apps.app_configs:
+        started = time.perf_counter()
+        self.import_durations = {}
+        for app_config in django_apps.get_app_configs():
+            app = app_config.name
             writer(f' * searching {app}           \r')
             try:
-                mod = import_module(app)
-                try:
-                    before_import_registry = deepcopy(site_consents.registry)
-                    import_module(f'{app}.{module_name}')
-                    writer(
-                        f' * registered consents \'{module_name}\' from \'{app}\'\n')
-                except ConsentError as e:
-                    writer(f'   - loading {app}.consents ... ')
-                    writer(style.ERROR(f'ERROR! {e}\n'))
-                except ImportError as e:
-                    site_consents.registry = before_import_registry
-                    if module_has_submodule(mod, module_name):
-                        raise SiteConsentError(str(e))
+                spec = find_spec(f'{app}.{module_name}')
             except ImportError:
-                pass
+                spec = None
+            if not spec:
+                continue
+            before_import_registry = dict(self.registry)
+            import_started = time.perf_counter()
+            try:
+                import_module(f'{app}.{module_name}')
+                writer(
+                    f' * registered consents \'{module_name}\' from \'{app}\'\n')
+            except ConsentError as e:
+                writer(f'   - loading {app}.consents ... ')
+                writer(style.ERROR(f'ERROR! {e}\n'))
+            except ImportError as e:
+                self.registry = before_import_registry
+                raise SiteConsentError(str(e))
+            finally:
+                self.import_durations.update(
+                    {app: time.perf_counter() - import_started})
+        self.cache.invalidate()
+        duration = time.perf_counter() - started
+        logger.info(
+            f'Discovered {len(self.registry)} consents in {duration:.3f}s.',
+            extra=dict(
+                consents=[dict(name=consent.name,
+                               start=consent.start.isoformat(),
+                               end=consent.end.isoformat())
+                          for consent in self.consents],
+                autodiscover_duration=duration,
+                import_durations=self.import_durations))
 
 
 site_consents = SiteConsents()
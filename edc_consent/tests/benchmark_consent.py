@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+from django.core.management.color import color_style
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from model_mommy import mommy
+
+from ..site_consents import site_consents
+from .consent_test_case import ConsentTestCase
+from .dates_test_mixin import DatesTestMixin
+from .models import CrfOne, SubjectConsent, TestModel
+from .test_consent_form import SubjectConsentForm
+from .test_view_mixins import ConsentView
+from .visit_schedules import visit_schedule
+
+style = color_style()
+
+
+class BenchmarkTestCase(DatesTestMixin, ConsentTestCase):
+
+    """A test case that times hot paths and writes ops/sec and
+    queries/op for each benchmark to a JSON file.
+
+    Run with:
+
+        python manage.py test edc_consent.tests --pattern="benchmark_*.py"
+
+    Set EDC_CONSENT_BENCHMARK_OUTPUT to choose the JSON file and
+    EDC_CONSENT_DB_ENGINE=postgresql (see settings.py) to run
+    against Postgres. Queries are captured while timing, which adds
+    a small constant overhead per query.
+    """
+
+    results = []
+
+    def benchmark(self, name=None, func=None, number=None):
+        """Calls func(index) `number` times and records the result.
+        """
+        number = number or 100
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            for index in range(0, number):
+                func(index)
+            elapsed = time.perf_counter() - started
+        result = dict(
+            name=name,
+            number=number,
+            seconds=round(elapsed, 4),
+            ops_per_sec=round(number / elapsed, 1),
+            queries_per_op=round(len(context.captured_queries) / number, 2))
+        self.results.append(result)
+        sys.stdout.write(style.NOTICE(
+            f' * {name}: {result["ops_per_sec"]} ops/sec, '
+            f'{result["queries_per_op"]} queries/op\n'))
+        return result
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        try:
+            commit = subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        path = os.environ.get(
+            'EDC_CONSENT_BENCHMARK_OUTPUT',
+            f'benchmark-{commit or "unknown"}-{connection.vendor}.json')
+        with open(path, 'w') as f:
+            json.dump(dict(
+                commit=commit, vendor=connection.vendor, results=cls.results),
+                f, indent=2)
+        sys.stdout.write(style.SUCCESS(f' * benchmark results written to {path}\n'))
+
+
+class BenchmarkConsent(BenchmarkTestCase):
+
+    def register_consents(self, count=None):
+        for index in range(0, count):
+            start = self.study_open_datetime + timedelta(days=index)
+            self.consent_object_factory(
+                start=start,
+                end=start + timedelta(hours=23),
+                version=str(index))
+
+    def make_consent(self, index=None, **kwargs):
+        return mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            subject_identifier=f'S{index:06d}',
+            first_name=f'ERIK{index}',
+            identity=f'{100000000 + index}',
+            confirm_identity=f'{100000000 + index}',
+            dob=self.dob,
+            **kwargs)
+
+    def test_register(self):
+        def register(index):
+            site_consents.registry = {}
+            self.register_consents(count=100)
+        self.benchmark(name='site_consents.register x 100', func=register, number=10)
+
+    def test_get_consent_for_period(self):
+        self.register_consents(count=100)
+
+        def get_consent_for_period(index):
+            site_consents.get_consent_for_period(
+                model='edc_consent.subjectconsent',
+                report_datetime=self.study_open_datetime + timedelta(
+                    days=index % 100, hours=index % 23))
+        self.benchmark(
+            name='site_consents.get_consent_for_period',
+            func=get_consent_for_period, number=10000)
+
+    def test_consent_model_save(self):
+        self.consent_object_factory()
+
+        def save(index):
+            self.make_consent(
+                index=index,
+                consent_datetime=self.study_open_datetime + relativedelta(days=1))
+        self.benchmark(name='ConsentModelMixin.save', func=save, number=200)
+
+    def test_consent_form_is_valid(self):
+        self.consent_object_factory()
+        subject_consent = mommy.prepare_recipe(
+            'edc_consent.subjectconsent',
+            dob=self.dob,
+            consent_datetime=self.study_open_datetime + relativedelta(days=1))
+        subject_consent.initials = (subject_consent.first_name[0]
+                                    + subject_consent.last_name[0])
+        data = subject_consent.__dict__
+
+        def is_valid(index):
+            form = SubjectConsentForm(data=data)
+            self.assertTrue(form.is_valid())
+        self.benchmark(
+            name='ConsentModelFormMixin.is_valid', func=is_valid, number=200)
+
+    def test_requires_consent_on_pre_save(self):
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule)
+        self.consent_object_factory()
+        report_datetime = self.study_open_datetime + relativedelta(days=1)
+        self.make_consent(index=0, consent_datetime=report_datetime)
+
+        def save(index):
+            CrfOne.objects.create(
+                subject_identifier='S000000', report_datetime=report_datetime)
+        self.benchmark(
+            name='requires_consent_on_pre_save (CRF save)', func=save, number=500)
+
+    def test_unrelated_model_save(self):
+        """Times saving a model that is not a post-consent model
+        to measure pre_save dispatch overhead.
+        """
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule)
+
+        def save(index):
+            TestModel.objects.create(
+                subject_identifier=f'S{index:06d}',
+                report_datetime=self.study_open_datetime)
+        self.benchmark(name='unrelated model save', func=save, number=500)
+
+    def test_consent_view_get_context_data(self):
+        self.consent_object_factory()
+        consent_datetime = self.study_open_datetime + relativedelta(days=1)
+        self.make_consent(index=0, consent_datetime=consent_datetime)
+        self.assertEqual(SubjectConsent.objects.count(), 1)
+
+        def get_context_data(index):
+            view = ConsentView(
+                subject_identifier='S000000', report_datetime=consent_datetime)
+            view.get_context_data()
+        self.benchmark(
+            name='ConsentViewMixin.get_context_data',
+            func=get_context_data, number=500)
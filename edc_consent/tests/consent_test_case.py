@@ -2,6 +2,7 @@ from dateutil.relativedelta import relativedelta
 from django.test import TestCase, tag
 
 from ..consent import Consent
+from ..consent_datetime_cache import consent_datetime_cache
 from ..site_consents import site_consents
 
 
@@ -10,6 +11,7 @@ class ConsentTestCase(TestCase):
     def setUp(self):
         super().setUp()
         site_consents.registry = {}
+        consent_datetime_cache.invalidate()
         self.dob = self.study_open_datetime - relativedelta(years=25)
 
     def consent_object_factory(self, model=None, start=None, end=None, gender=None,
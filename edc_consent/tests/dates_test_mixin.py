@@ -1,4 +1,3 @@
-import copy
 import sys
 
 from copy import deepcopy
@@ -69,13 +68,11 @@ class DatesTestMixin:
                 new_startdate)
 
             for consent in site_consents.consents:
-                test_consent = copy.copy(consent)
-                test_consent.start = (
-                    test_consent.arrow.rstart.floor('hour').datetime
-                    - relativedelta(days=tdelta.days))
-                test_consent.end = (
-                    test_consent.arrow.rend.ceil('hour').datetime
-                    - relativedelta(days=tdelta.days))
+                test_consent = consent.replace(
+                    start=(consent.arrow.rstart.floor('hour').datetime
+                           - relativedelta(days=tdelta.days)),
+                    end=(consent.arrow.rend.ceil('hour').datetime
+                         - relativedelta(days=tdelta.days)))
                 sys.stdout.write(style.NOTICE(
                     ' * {}: {} - {}\n'.format(
                         test_consent.name, test_consent.start, test_consent.end)))
@@ -1,4 +1,5 @@
 from django.db import models
+from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.utils import get_utcnow
 from edc_identifier.model_mixins import NonUniqueSubjectIdentifierModelMixin
@@ -6,7 +7,8 @@ from edc_registration.model_mixins import UpdatesOrCreatesRegistrationModelMixin
 
 from ..field_mixins import ReviewFieldsMixin, PersonalFieldsMixin, CitizenFieldsMixin
 from ..field_mixins import VulnerabilityFieldsMixin, IdentityFieldsMixin
-from ..model_mixins import ConsentModelMixin, RequiresConsentFieldsModelMixin
+from ..model_mixins import ConsentCoverageModelMixin, ConsentModelMixin
+from ..model_mixins import RequiresConsentFieldsModelMixin
 from edc_base.sites.site_model_mixin import SiteModelMixin
 
 
@@ -30,6 +32,19 @@ class SubjectConsent2(ConsentModelMixin, SiteModelMixin,
         pass
 
 
+class SubjectConsentWithHistory(ConsentModelMixin, SiteModelMixin,
+                                NonUniqueSubjectIdentifierModelMixin,
+                                UpdatesOrCreatesRegistrationModelMixin,
+                                IdentityFieldsMixin, ReviewFieldsMixin,
+                                PersonalFieldsMixin, CitizenFieldsMixin,
+                                VulnerabilityFieldsMixin, BaseUuidModel):
+
+    history = HistoricalRecords()
+
+    class Meta(ConsentModelMixin.Meta):
+        pass
+
+
 class TestModel(NonUniqueSubjectIdentifierModelMixin, RequiresConsentFieldsModelMixin,
                 BaseUuidModel):
 
@@ -39,3 +54,9 @@ class TestModel(NonUniqueSubjectIdentifierModelMixin, RequiresConsentFieldsModel
 class CrfOne(NonUniqueSubjectIdentifierModelMixin, BaseUuidModel):
 
     report_datetime = models.DateTimeField(default=get_utcnow)
+
+
+class ConsentCoverage(ConsentCoverageModelMixin, BaseUuidModel):
+
+    class Meta(ConsentCoverageModelMixin.Meta):
+        pass
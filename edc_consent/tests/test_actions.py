@@ -2,9 +2,10 @@ from django.test import tag
 from model_mommy import mommy
 
 from ..actions import verify_consent, unverify_consent
+from ..actions import verify_consents, unverify_consents
 from .consent_test_case import ConsentTestCase
 from .dates_test_mixin import DatesTestMixin
-from .models import SubjectConsent
+from .models import SubjectConsent, SubjectConsentWithHistory
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth.models import User
 from django.http.request import HttpRequest
@@ -37,3 +38,40 @@ class TestActions(DatesTestMixin, ConsentTestCase):
             self.assertFalse(consent_obj.is_verified)
             self.assertIsNone(consent_obj.verified_by)
             self.assertIsNone(consent_obj.is_verified_datetime)
+
+    def test_verify_consents(self):
+        with self.assertNumQueries(1):
+            verified = verify_consents(
+                queryset=SubjectConsent.objects.all(), user=self.request.user)
+        self.assertEqual(verified, 3)
+        for consent_obj in SubjectConsent.objects.all():
+            self.assertTrue(consent_obj.is_verified)
+            self.assertEqual(consent_obj.verified_by, 'erikvw')
+            self.assertIsNotNone(consent_obj.is_verified_datetime)
+        self.assertEqual(verify_consents(
+            queryset=SubjectConsent.objects.all(), user=self.request.user), 0)
+
+    def test_unverify_consents(self):
+        verify_consents(
+            queryset=SubjectConsent.objects.all(), user=self.request.user)
+        unverified = unverify_consents(
+            queryset=SubjectConsent.objects.all(), user=self.request.user)
+        self.assertEqual(unverified, 3)
+        for consent_obj in SubjectConsent.objects.all():
+            self.assertFalse(consent_obj.is_verified)
+            self.assertIsNone(consent_obj.verified_by)
+            self.assertIsNone(consent_obj.is_verified_datetime)
+
+    def test_verify_consents_with_history(self):
+        self.consent_object_factory(model='edc_consent.subjectconsentwithhistory')
+        mommy.make_recipe(
+            'edc_consent.subjectconsentwithhistory', _quantity=3,
+            consent_datetime=self.study_open_datetime + relativedelta(days=1))
+        verified = verify_consents(
+            queryset=SubjectConsentWithHistory.objects.all(), user=self.request.user)
+        self.assertEqual(verified, 3)
+        for consent_obj in SubjectConsentWithHistory.objects.all():
+            self.assertTrue(consent_obj.is_verified)
+            history = consent_obj.history.filter(is_verified=True)
+            self.assertEqual(history.count(), 1)
+            self.assertEqual(history.get().history_user, self.request.user)
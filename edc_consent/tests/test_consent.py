@@ -1,3 +1,6 @@
+import copy
+import pickle
+
 from datetime import timedelta, datetime
 from dateutil.relativedelta import relativedelta
 from django.apps import apps as django_apps
@@ -359,3 +362,21 @@ class TestConsent(DatesTestMixin, ConsentTestCase):
             start=study_open_datetime,
             end=dte,
             version='1.0')
+
+    def test_consent_object_is_immutable(self):
+        consent = self.consent_object_factory(
+            start=self.study_open_datetime,
+            end=self.study_open_datetime + timedelta(days=50),
+            updates_versions='0.1, 0.2')
+        self.assertRaises(AttributeError, setattr, consent, 'version', '2')
+        self.assertEqual(consent.name, 'edc_consent.subjectconsent-1')
+        self.assertEqual(consent.updates_versions, ('0.1', '0.2'))
+        self.assertEqual(consent.gender, frozenset(['M', 'F']))
+        self.assertIs(consent.model_cls, consent.model_cls)
+        self.assertEqual(copy.deepcopy(consent), consent)
+        self.assertEqual(pickle.loads(pickle.dumps(consent)), consent)
+        consent2 = consent.replace(version='2')
+        self.assertNotEqual(consent2, consent)
+        self.assertEqual(consent2.version, '2')
+        self.assertEqual(consent2.start, consent.start)
+        self.assertEqual(len(set([consent, consent.replace(), consent2])), 2)
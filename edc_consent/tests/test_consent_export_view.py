@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.test import RequestFactory
+from model_mommy import mommy
+
+from ..consent_exporter import ConsentExporter
+from ..views import ConsentExportView
+from .consent_test_case import ConsentTestCase
+from .dates_test_mixin import DatesTestMixin
+
+
+class TestConsentExportView(DatesTestMixin, ConsentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.consent_object_factory()
+        self.subject_consent = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            first_name='ERIK',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob)
+        self.user = User.objects.create(username='erikvw')
+        self.factory = RequestFactory()
+
+    def add_permissions(self, *codenames):
+        for codename in codenames:
+            self.user.user_permissions.add(
+                Permission.objects.get(
+                    content_type__app_label='edc_consent', codename=codename))
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def get(self, model=None, **data):
+        request = self.factory.get(f'/export/{model}/', data=data)
+        request.user = self.user
+        return ConsentExportView.as_view()(request, model=model)
+
+    def test_streams_consents(self):
+        self.add_permissions('view_subjectconsent')
+        response = self.get(
+            model='edc_consent.subjectconsent', format='jsonl',
+            field=['subject_identifier', 'first_name'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [dict(
+            subject_identifier=self.subject_consent.subject_identifier,
+            first_name=ConsentExporter.mask)])
+
+    def test_streams_decrypted_consents(self):
+        self.add_permissions('view_subjectconsent', 'change_subjectconsent')
+        response = self.get(
+            model='edc_consent.subjectconsent',
+            field=['subject_identifier', 'first_name'], decrypt='first_name')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[1], f'{self.subject_consent.subject_identifier},ERIK')
+
+    def test_not_a_consent_model(self):
+        self.add_permissions('view_subjectconsent')
+        self.assertRaises(Http404, self.get, model='auth.user')
+
+    def test_requires_view_permission(self):
+        self.assertRaises(
+            PermissionDenied, self.get, model='edc_consent.subjectconsent')
+
+    def test_decrypt_requires_change_permission(self):
+        self.add_permissions('view_subjectconsent')
+        self.assertRaises(
+            PermissionDenied, self.get, model='edc_consent.subjectconsent',
+            decrypt='first_name')
@@ -1,7 +1,9 @@
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 from django import forms
-from django.test import TestCase, tag
+from django.db import connection
+from django.test import TestCase, tag, override_settings
+from django.test.utils import CaptureQueriesContext
 from edc_constants.constants import NO, MALE, FEMALE
 from faker import Faker
 from model_mommy import mommy
@@ -114,6 +116,28 @@ class TestConsentForm(DatesTestMixin, TestCase):
         consent_form = SubjectConsentForm(consent2.__dict__)
         self.assertFalse(consent_form.is_valid())
 
+    def test_base_form_identity_previously_reported_without_fingerprint(self):
+        mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob,
+            first_name='ERIK',
+            last_name='BOND',
+            initials='EB',
+            identity='123156788', confirm_identity='123156788')
+        SubjectConsent.objects.update(fingerprint=None)
+        consent2 = mommy.prepare_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime + timedelta(days=60),
+            dob=self.dob,
+            first_name='ERIK',
+            last_name='BOND',
+            initials='EB',
+            identity='123156789', confirm_identity='123156789')
+        consent_form = SubjectConsentForm(consent2.__dict__)
+        self.assertFalse(consent_form.is_valid())
+        self.assertIn('previously reported', str(consent_form.errors.get('identity')))
+
     def test_base_form_guardian_and_dob1(self):
         """Asserts form for minor is not valid without guardian name.
         """
@@ -132,6 +156,24 @@ class TestConsentForm(DatesTestMixin, TestCase):
         consent_form = SubjectConsentForm(subject_consent.__dict__)
         self.assertFalse(consent_form.is_valid())
 
+    @override_settings(TIME_ZONE='Africa/Gaborone')
+    def test_base_form_guardian_on_local_birthday(self):
+        """Asserts the adult/minor decision uses the local date of
+        consent, 00:30 in Gaborone, not the UTC date.
+        """
+        consent_datetime = (self.study_open_datetime + timedelta(days=10)).replace(
+            hour=22, minute=30, second=0, microsecond=0)
+        subject_consent = mommy.prepare_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=consent_datetime,
+            dob=(consent_datetime + timedelta(days=1)).date() - relativedelta(years=18))
+        subject_consent.guardian_name = None
+        subject_consent.initials = (subject_consent.first_name[0]
+                                    + subject_consent.last_name[0])
+        consent_form = SubjectConsentForm(subject_consent.__dict__)
+        consent_form.is_valid()
+        self.assertNotIn('Guardian', str(consent_form.errors))
+
     def test_base_form_guardian_and_dob2(self):
         """Asserts form for minor is valid with guardian name.
         """
@@ -253,3 +295,36 @@ class TestConsentForm(DatesTestMixin, TestCase):
             0] + subject_consent.last_name[0]
         form = SubjectConsentForm(subject_consent.__dict__)
         self.assertTrue(form.is_valid())
+
+    def test_base_form_reports_all_errors(self):
+        subject_consent = mommy.prepare_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob,
+            first_name='ERIK',
+            last_name='BOND',
+            initials='XX',
+            is_literate=NO,
+            witness_name='')
+        form = SubjectConsentForm(subject_consent.__dict__)
+        self.assertFalse(form.is_valid())
+        self.assertIn('initials', form.errors)
+        self.assertIn('witness_name', form.errors)
+
+    def test_base_form_query_budget(self):
+        """Asserts validating a consent form stays within a
+        query budget.
+
+        Budget is one query for identity uniqueness, one for the
+        registered subject and a few for model field validation.
+        """
+        subject_consent = mommy.prepare_recipe(
+            'edc_consent.subjectconsent',
+            dob=self.dob,
+            consent_datetime=self.study_open_datetime)
+        subject_consent.initials = (subject_consent.first_name[0]
+                                    + subject_consent.last_name[0])
+        consent_form = SubjectConsentForm(data=subject_consent.__dict__)
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(consent_form.is_valid())
+        self.assertLessEqual(len(context.captured_queries), 5)
@@ -1,13 +1,27 @@
+import csv
+import json
+import os
+
 from datetime import timedelta
+from tempfile import TemporaryDirectory
+from uuid import uuid4
 from dateutil.relativedelta import relativedelta
-from django.test import TestCase, tag
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command, CommandError
+from django.test import TestCase, tag, override_settings
+from edc_registration.models import RegisteredSubject
 from model_mommy import mommy
 
 from ..consent import Consent
+from ..consent_helper import ConsentHelper
+from ..consent_exporter import ConsentExporter, ConsentExportError
+from ..consent_importer import ConsentImporter
 from ..field_mixins import IdentityFieldsMixinError
+from ..fingerprint import consent_fingerprint
+from ..managers import prefetch_consent_for_period
 from ..site_consents import site_consents
 from .dates_test_mixin import DatesTestMixin
-from .models import SubjectConsent
+from .models import ConsentCoverage, SubjectConsent, TestModel
 from django.contrib.sites.models import Site
 
 
@@ -144,6 +158,34 @@ class TestConsentModel(DatesTestMixin, TestCase):
             dob=self.dob)
         self.assertEqual(consent.version, '3.0')
 
+    def test_consent_helper_previous_consent(self):
+        subject_identifier = '123456789'
+        identity = '987654321'
+        for days in [0, 51]:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                identity=identity,
+                confirm_identity=identity,
+                consent_datetime=self.study_open_datetime + timedelta(days=days),
+                dob=self.dob)
+        opts = dict(
+            model_cls=SubjectConsent,
+            subject_identifier=subject_identifier,
+            identity=identity,
+            consent_datetime=self.study_open_datetime + timedelta(days=101),
+            subject_identifier_as_pk=uuid4(),
+            subject_identifier_aka='123')
+        with self.assertNumQueries(1):
+            previous_consent = ConsentHelper(
+                update_previous=False, **opts).previous_consent
+        self.assertEqual(previous_consent.version, '2.0')
+        with self.assertNumQueries(1):
+            ConsentHelper(
+                update_previous=True, previous_consent=previous_consent, **opts)
+        previous_consent = SubjectConsent.objects.get(pk=previous_consent.pk)
+        self.assertEqual(previous_consent.subject_identifier_aka, '123')
+
     def test_manager(self):
         for i in range(1, 3):
             mommy.make_recipe(
@@ -192,3 +234,254 @@ class TestConsentModel(DatesTestMixin, TestCase):
             consent_datetime=self.study_open_datetime + relativedelta(days=1),
             identity='123456789',
             confirm_identity='987654321',)
+
+    def test_consents_for_period(self):
+        for subject_identifier in ['12345', '12346', '12347']:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                consent_datetime=self.study_open_datetime,
+                dob=self.dob)
+        with self.assertNumQueries(1):
+            consents = SubjectConsent.consent.consents_for_period(
+                subject_identifiers=['12345', '12346', '12348'],
+                report_datetime=self.study_open_datetime + timedelta(days=1))
+        self.assertEqual(sorted(consents), ['12345', '12346'])
+        self.assertEqual(consents['12345'].subject_identifier, '12345')
+        self.assertEqual(
+            SubjectConsent.consent.consents_for_period(
+                subject_identifiers=['12345'],
+                report_datetime=self.study_open_datetime + timedelta(days=60)),
+            {})
+
+    def test_prefetch_consent_for_period(self):
+        for subject_identifier in ['12345', '12346']:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                consent_datetime=self.study_open_datetime,
+                dob=self.dob)
+        objects = [
+            TestModel(subject_identifier=subject_identifier,
+                      report_datetime=self.study_open_datetime)
+            for subject_identifier in ['12345', '12346', '12347']]
+        objects.append(TestModel(
+            subject_identifier='12345',
+            report_datetime=self.study_open_datetime + timedelta(days=60)))
+        with self.assertNumQueries(1):
+            objects = prefetch_consent_for_period(
+                objects=objects, consent_model='edc_consent.subjectconsent')
+        self.assertEqual(objects[0].consent_for_period.subject_identifier, '12345')
+        self.assertEqual(objects[1].consent_for_period.subject_identifier, '12346')
+        self.assertIsNone(objects[2].consent_for_period)
+        self.assertIsNone(objects[3].consent_for_period)
+
+    def test_fingerprint(self):
+        subject_consent = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            first_name='ERIK',
+            initials='EB',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob)
+        fingerprint = consent_fingerprint(
+            first_name='erik', dob=self.dob, initials='EB')
+        self.assertEqual(subject_consent.fingerprint, fingerprint)
+        SubjectConsent.objects.update(fingerprint=None)
+        call_command('backfill_consent_fingerprints', stdout=None)
+        subject_consent = SubjectConsent.objects.get(pk=subject_consent.pk)
+        self.assertEqual(subject_consent.fingerprint, fingerprint)
+
+    @override_settings(EDC_CONSENT_COVERAGE=True)
+    def test_consent_coverage(self):
+        subject_consent = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob)
+        mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime + timedelta(days=60),
+            dob=self.dob)
+        subject_identifiers = SubjectConsent.objects.values_list(
+            'subject_identifier', flat=True)
+        with self.assertNumQueries(1):
+            covered = ConsentCoverage.objects.covered(
+                subject_identifiers=subject_identifiers,
+                consent_model='edc_consent.subjectconsent',
+                report_datetime=self.study_open_datetime + timedelta(days=10))
+        self.assertEqual(covered, {subject_consent.subject_identifier: '1.0'})
+        ConsentCoverage.objects.all().delete()
+        call_command('rebuild_consent_coverage', stdout=None)
+        self.assertEqual(ConsentCoverage.objects.all().count(), 2)
+        subject_consent.delete()
+        self.assertFalse(ConsentCoverage.objects.is_covered(
+            subject_identifier=subject_consent.subject_identifier,
+            consent_model='edc_consent.subjectconsent',
+            report_datetime=self.study_open_datetime + timedelta(days=10)))
+
+    @override_settings(EDC_CONSENT_COVERAGE=True, EDC_CONSENT_COVERAGE_MODEL=None)
+    def test_consent_coverage_model_not_set(self):
+        self.assertRaises(
+            ImproperlyConfigured, mommy.make_recipe,
+            'edc_consent.subjectconsent',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob)
+
+    def test_consent_exporter(self):
+        subject_consent = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            first_name='ERIK',
+            consent_datetime=self.study_open_datetime,
+            dob=self.dob)
+        exporter = ConsentExporter(
+            model='edc_consent.subjectconsent',
+            fields=['subject_identifier', 'first_name', 'identity'],
+            export_format='jsonl')
+        rows = [json.loads(line) for line in exporter.lines()]
+        self.assertEqual(rows, [dict(
+            subject_identifier=subject_consent.subject_identifier,
+            first_name=ConsentExporter.mask,
+            identity=ConsentExporter.mask)])
+        exporter = ConsentExporter(
+            model='edc_consent.subjectconsent',
+            fields=['subject_identifier', 'first_name'],
+            decrypt=['first_name'])
+        self.assertEqual(
+            list(exporter.lines())[1].strip(),
+            f'{subject_consent.subject_identifier},ERIK')
+        self.assertRaises(
+            ConsentExportError, ConsentExporter, model='auth.user')
+        self.assertRaises(
+            CommandError, call_command, 'export_consents', '--model', 'auth.user')
+
+    def consent_import_row(self, **kwargs):
+        subject_consent = mommy.prepare_recipe(
+            'edc_consent.subjectconsent', dob=self.dob, **kwargs)
+        subject_consent.initials = (subject_consent.first_name[0]
+                                    + subject_consent.last_name[0])
+        fields = [
+            'subject_identifier', 'consent_datetime', 'first_name', 'last_name',
+            'initials', 'dob', 'gender', 'identity', 'confirm_identity',
+            'identity_type', 'is_dob_estimated', 'language', 'is_literate',
+            'is_incarcerated', 'study_questions', 'consent_reviewed',
+            'consent_copy', 'assessment_score', 'consent_signature']
+        return {field: getattr(subject_consent, field) for field in fields}
+
+    def test_consent_importer(self):
+        row1 = self.consent_import_row(
+            subject_identifier='12345', identity='111111111',
+            confirm_identity='111111111',
+            consent_datetime=self.study_open_datetime)
+        row2 = self.consent_import_row(
+            subject_identifier='12346', identity='111111112',
+            confirm_identity='111111112',
+            consent_datetime=self.study_open_datetime)
+        row3 = dict(row1)
+        row3.update(consent_datetime=self.study_open_datetime + timedelta(days=110))
+        row4 = self.consent_import_row(
+            subject_identifier='12347', identity='111111113',
+            confirm_identity='111111113',
+            consent_datetime=self.study_open_datetime + timedelta(days=110))
+        row5 = self.consent_import_row(
+            subject_identifier='12348', identity='111111114',
+            confirm_identity='111111114',
+            consent_datetime=self.study_open_datetime + timedelta(days=500))
+        importer = ConsentImporter(model='edc_consent.subjectconsent')
+        importer.import_rows([row1, row2, row3, row4, row5, row1])
+        self.assertEqual(importer.created, 3)
+        self.assertEqual(importer.updated, 0)
+        self.assertEqual(
+            [rejected['row_number'] for rejected in importer.rejected], [4, 5, 6])
+        consent_v1 = SubjectConsent.objects.get(subject_identifier='12345', version='1.0')
+        consent_v3 = SubjectConsent.objects.get(subject_identifier='12345', version='3.0')
+        self.assertEqual(
+            consent_v1.subject_identifier_as_pk, consent_v3.subject_identifier_as_pk)
+        self.assertIsNotNone(consent_v3.fingerprint)
+        self.assertEqual(
+            RegisteredSubject.objects.filter(
+                subject_identifier__in=['12345', '12346']).count(), 2)
+
+    def test_consent_importer_unique_together(self):
+        row1 = self.consent_import_row(
+            subject_identifier='12345', identity='111111111',
+            confirm_identity='111111111',
+            consent_datetime=self.study_open_datetime)
+        row2 = dict(row1)
+        row2.update(subject_identifier='12346', identity='111111112',
+                    confirm_identity='111111112')
+        importer = ConsentImporter(model='edc_consent.subjectconsent')
+        importer.import_rows([row1])
+        importer.import_rows([row2])
+        self.assertEqual(importer.created, 1)
+        self.assertEqual(
+            [rejected['row_number'] for rejected in importer.rejected], [1])
+
+    def test_consent_importer_integrity_error(self):
+
+        class Importer(ConsentImporter):
+            def exclude_existing(self, prepared=None):
+                return prepared
+
+        row1 = self.consent_import_row(
+            subject_identifier='12345', identity='111111111',
+            confirm_identity='111111111',
+            consent_datetime=self.study_open_datetime)
+        row2 = self.consent_import_row(
+            subject_identifier='12346', identity='111111112',
+            confirm_identity='111111112',
+            consent_datetime=self.study_open_datetime)
+        importer = Importer(model='edc_consent.subjectconsent')
+        importer.import_rows([row1, row2, row1])
+        self.assertEqual(importer.created, 2)
+        self.assertEqual(
+            [rejected['row_number'] for rejected in importer.rejected], [3])
+        self.assertEqual(SubjectConsent.objects.count(), 2)
+
+    def test_import_consents_command(self):
+        consent_datetime = self.study_open_datetime + timedelta(hours=1)
+        row1 = self.consent_import_row(
+            subject_identifier='12345', identity='111111111',
+            confirm_identity='111111111', consent_datetime=consent_datetime)
+        row2 = self.consent_import_row(
+            subject_identifier='12346', identity='111111112',
+            confirm_identity='111111112', consent_datetime=consent_datetime)
+        row2.update(gender='X')
+        row3 = self.consent_import_row(
+            subject_identifier='12347', identity='111111113',
+            confirm_identity='111111113', consent_datetime=consent_datetime)
+        row3.update(consent_datetime='not a datetime')
+        for row in [row1, row2]:
+            row.update(consent_datetime=consent_datetime.strftime('%Y-%m-%d %H:%M'))
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'consents.csv')
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(row1))
+                writer.writeheader()
+                for row in [row1, row2, row3]:
+                    writer.writerow(row)
+            call_command('import_consents', path,
+                         '--model', 'edc_consent.subjectconsent', stdout=None)
+            with open(f'{path}.rejected.jsonl') as f:
+                rejected = [json.loads(line) for line in f]
+        self.assertEqual([r['row_number'] for r in rejected], [2, 3])
+        self.assertIn('Gender of consent', rejected[0]['error'])
+        subject_consent = SubjectConsent.objects.get(subject_identifier='12345')
+        self.assertEqual(subject_consent.consent_datetime, consent_datetime.replace(
+            second=0, microsecond=0))
+
+    def test_import_consents_command_jsonl(self):
+        row = self.consent_import_row(
+            subject_identifier='12345', identity='111111111',
+            confirm_identity='111111111',
+            consent_datetime=self.study_open_datetime + timedelta(hours=1))
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'consents.jsonl')
+            with open(path, 'w') as f:
+                f.write('{"subject_identifier": \n')
+                f.write(json.dumps(row, default=str) + '\n')
+            call_command('import_consents', path,
+                         '--model', 'edc_consent.subjectconsent', stdout=None)
+            with open(f'{path}.rejected.jsonl') as f:
+                rejected = [json.loads(line) for line in f]
+        self.assertEqual([r['row_number'] for r in rejected], [1])
+        self.assertTrue(SubjectConsent.objects.filter(
+            subject_identifier='12345').exists())
@@ -0,0 +1,87 @@
+from dateutil.relativedelta import relativedelta
+from types import SimpleNamespace
+from model_mommy import mommy
+
+from ..model_wrappers import ConsentModelWrapperMixin
+from .consent_test_case import ConsentTestCase
+from .dates_test_mixin import DatesTestMixin
+from .models import SubjectConsent, TestModel
+
+
+class ConsentModelWrapper:
+
+    model = 'edc_consent.subjectconsent'
+
+    def __init__(self, model_obj=None):
+        self.object = model_obj
+
+
+class TestModelWrapper(ConsentModelWrapperMixin):
+
+    consent_model_wrapper_cls = ConsentModelWrapper
+    consent_relation = None
+
+    def __init__(self, model_obj=None):
+        self.object = model_obj
+
+
+class RelatedTestModelWrapper(TestModelWrapper):
+
+    consent_relation = 'subjectconsent_set'
+
+
+class TestModelWrappers(DatesTestMixin, ConsentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.consent_object_factory(
+            end=self.study_open_datetime + relativedelta(days=50))
+        self.consent_object_factory(
+            start=self.study_open_datetime + relativedelta(days=51),
+            version='2')
+        self.report_datetime = self.study_open_datetime + relativedelta(days=1)
+        for subject_identifier in ['12345', '12346']:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                consent_datetime=self.report_datetime,
+                dob=self.dob)
+
+    def test_consent(self):
+        wrapper = TestModelWrapper(model_obj=TestModel(
+            subject_identifier='12345', report_datetime=self.report_datetime))
+        with self.assertNumQueries(1):
+            self.assertEqual(wrapper.consent.object.subject_identifier, '12345')
+            self.assertEqual(wrapper.consent.object.version, '1')
+
+    def test_wrap_many(self):
+        objects = [
+            TestModel(subject_identifier=subject_identifier,
+                      report_datetime=self.report_datetime)
+            for subject_identifier in ['12345', '12346', '12347']]
+        objects.append(TestModel(
+            subject_identifier='12345',
+            report_datetime=self.study_open_datetime + relativedelta(days=60)))
+        with self.assertNumQueries(1):
+            wrappers = TestModelWrapper.wrap_many(objects)
+            consents = [wrapper.consent.object for wrapper in wrappers]
+        self.assertEqual(
+            [(obj.subject_identifier, obj.version, not obj._state.adding)
+             for obj in consents],
+            [('12345', '1', True), ('12346', '1', True),
+             ('12347', '1', False), ('12345', '2', False)])
+
+    def test_consent_relation(self):
+        model_obj = SimpleNamespace(
+            subject_identifier='12345',
+            report_datetime=self.report_datetime,
+            subjectconsent_set=SubjectConsent.objects.filter(
+                subject_identifier='12345'))
+        wrapper = RelatedTestModelWrapper(model_obj=model_obj)
+        with self.assertNumQueries(1):
+            self.assertEqual(wrapper.consent.object.subject_identifier, '12345')
+            self.assertFalse(wrapper.consent.object._state.adding)
+        model_obj.report_datetime = self.study_open_datetime + relativedelta(days=60)
+        wrapper = RelatedTestModelWrapper(model_obj=model_obj)
+        self.assertTrue(wrapper.consent.object._state.adding)
+        self.assertEqual(wrapper.consent.object.version, '2')
@@ -1,17 +1,28 @@
+import asyncio
+
+from unittest.mock import patch, PropertyMock
+from asgiref.sync import async_to_sync
 from dateutil.relativedelta import relativedelta
+from django.db import connection
 from django.test import tag
 from edc_base.utils import get_utcnow
 from edc_locator.models import SubjectLocator
+from edc_registration.models import RegisteredSubject
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 from model_mommy import mommy
 
+from ..consent_datetime_cache import consent_datetime_cache
+from ..consent_lookup_cache import consent_lookup_cache, get_consent_lookup_cache
 from ..exceptions import NotConsentedError
-from ..requires_consent import RequiresConsent
+from ..instrumentation import instrumentation, MemorySink
+from ..requires_consent import RequiresConsent, arequires_consent
+from ..signals import _requires_consent_senders, connect_consent_model_signals
+from ..signals import sync_requires_consent_signals
 from ..site_consents import SiteConsentError
 from .consent_test_case import ConsentTestCase
 from .dates_test_mixin import DatesTestMixin
 from .visit_schedules import visit_schedule
-from .models import CrfOne
+from .models import CrfOne, SubjectConsent, TestModel
 
 
 class TestRequiresConsent(DatesTestMixin, ConsentTestCase):
@@ -92,3 +103,185 @@ class TestRequiresConsent(DatesTestMixin, ConsentTestCase):
                 report_datetime=self.study_open_datetime + relativedelta(months=1))
         except NotConsentedError as e:
             self.fail(f'NotConsentedError unexpectedly raised. Got {e}')
+
+    def test_check_many(self):
+        self.consent_object_factory()
+        report_datetime = self.study_open_datetime + relativedelta(months=1)
+        for subject_identifier in ['12345', '12346']:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                consent_datetime=report_datetime)
+        instances = [
+            TestModel(subject_identifier=subject_identifier,
+                      report_datetime=report_datetime)
+            for subject_identifier in ['12345', '12346', '12347', '12348']]
+        instances.append(TestModel(
+            subject_identifier='12345',
+            report_datetime=self.study_close_datetime + relativedelta(days=1)))
+        with self.assertNumQueries(1):
+            uncovered = RequiresConsent.check_many(
+                instances=instances,
+                consent_model='edc_consent.subjectconsent')
+        self.assertEqual(uncovered, instances[2:])
+        self.assertEqual(instances[0].consent_version, '1')
+        self.assertEqual(instances[1].consent_version, '1')
+
+    def test_consent_lookup_cache(self):
+        self.consent_object_factory()
+        consent_obj = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            subject_identifier=self.subject_identifier,
+            consent_datetime=self.study_open_datetime + relativedelta(months=1))
+        opts = dict(
+            model='edc_consent.testmodel',
+            subject_identifier=self.subject_identifier,
+            consent_model='edc_consent.subjectconsent',
+            report_datetime=self.study_open_datetime)
+        with consent_lookup_cache():
+            RequiresConsent(**opts)
+            with self.assertNumQueries(0):
+                RequiresConsent(**opts)
+            consent_obj.delete()
+            self.assertRaises(NotConsentedError, RequiresConsent, **opts)
+        with self.assertNumQueries(1):
+            self.assertRaises(NotConsentedError, RequiresConsent, **opts)
+
+    def test_instrumentation(self):
+        self.consent_object_factory()
+        mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            subject_identifier=self.subject_identifier,
+            consent_datetime=self.study_open_datetime + relativedelta(months=1))
+        sink = MemorySink()
+        instrumentation.configure(sink=sink)
+        try:
+            RequiresConsent(
+                model='edc_consent.testmodel',
+                subject_identifier=self.subject_identifier,
+                consent_model='edc_consent.subjectconsent',
+                report_datetime=self.study_open_datetime)
+        finally:
+            instrumentation.configure(sink=None)
+        self.assertEqual(
+            sink.counters.get('requires_consent.consented_or_raise.calls'), 1)
+        self.assertEqual(
+            sink.counters.get('requires_consent.consented_or_raise.queries'), 1)
+        self.assertEqual(
+            sink.counters.get('site_consents.get_consent_for_period.queries'), 0)
+        self.assertEqual(
+            len(sink.timings.get('requires_consent.consented_or_raise')), 1)
+        RequiresConsent(
+            model='edc_consent.testmodel',
+            subject_identifier=self.subject_identifier,
+            consent_model='edc_consent.subjectconsent',
+            report_datetime=self.study_open_datetime)
+        self.assertEqual(
+            sink.counters.get('requires_consent.consented_or_raise.calls'), 1)
+
+    def test_consent_lookup_cache_per_task(self):
+
+        async def lookup(started=None, other_started=None):
+            with consent_lookup_cache() as cache:
+                started.set()
+                await other_started.wait()
+                return cache is get_consent_lookup_cache()
+
+        async def lookups():
+            started, other_started = asyncio.Event(), asyncio.Event()
+            return await asyncio.gather(
+                lookup(started, other_started), lookup(other_started, started))
+
+        self.assertEqual(async_to_sync(lookups)(), [True, True])
+        self.assertIsNone(get_consent_lookup_cache())
+
+    def test_async_requires_consent(self):
+        self.consent_object_factory()
+        consent_obj = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            subject_identifier=self.subject_identifier,
+            consent_datetime=self.study_open_datetime + relativedelta(months=1))
+        opts = dict(
+            model='edc_consent.testmodel',
+            subject_identifier=self.subject_identifier,
+            consent_model='edc_consent.subjectconsent',
+            report_datetime=self.study_open_datetime)
+        requires_consent = async_to_sync(arequires_consent)(**opts)
+        self.assertEqual(requires_consent.version, '1')
+        self.assertEqual(
+            async_to_sync(SubjectConsent.consent.aconsent_for_period)(
+                subject_identifier=self.subject_identifier,
+                report_datetime=self.study_open_datetime),
+            consent_obj)
+        self.assertEqual(
+            async_to_sync(SubjectConsent.consent.aconsents_for_period)(
+                subject_identifiers=[self.subject_identifier, '99999'],
+                report_datetime=self.study_open_datetime),
+            {self.subject_identifier: consent_obj})
+        opts.update(subject_identifier='99999')
+        self.assertRaises(
+            NotConsentedError, async_to_sync(arequires_consent), **opts)
+
+    def test_sync_requires_consent_signals(self):
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule)
+        labels = sync_requires_consent_signals()
+        self.assertIn('edc_consent.crfone', labels)
+        self.assertNotIn('edc_consent.testmodel', labels)
+        self.assertEqual(sync_requires_consent_signals(), labels)
+
+    def test_sync_requires_consent_signals_skips_unknown_model(self):
+        all_post_consent_models = {
+            'edc_consent.crfone': 'edc_consent.subjectconsent',
+            'edc_example.crfmissing': 'edc_consent.subjectconsent'}
+        with patch.object(type(site_visit_schedules), 'all_post_consent_models',
+                          new_callable=PropertyMock,
+                          return_value=all_post_consent_models):
+            with self.assertLogs('edc_consent.signals', level='WARNING'):
+                labels = sync_requires_consent_signals()
+        self.assertEqual(labels, ['edc_consent.crfone'])
+
+    def test_register_visit_schedule_syncs_requires_consent_signals(self):
+        site_visit_schedules._registry = {}
+        self.assertNotIn('edc_consent.crfone', sync_requires_consent_signals())
+        site_visit_schedules.register(visit_schedule)
+        self.assertIn('edc_consent.crfone', _requires_consent_senders)
+
+    def test_connect_consent_model_signals(self):
+        labels = connect_consent_model_signals()
+        self.assertIn('edc_consent.subjectconsent', labels)
+        self.assertIn('edc_registration.registeredsubject', labels)
+        self.assertNotIn('edc_consent.testmodel', labels)
+        self.assertEqual(connect_consent_model_signals(), labels)
+
+    def test_consent_datetime_cache(self):
+        self.consent_object_factory()
+        consent_datetime = self.study_open_datetime + relativedelta(months=1)
+        for subject_identifier in ['12345', '12346']:
+            mommy.make_recipe(
+                'edc_consent.subjectconsent',
+                subject_identifier=subject_identifier,
+                consent_datetime=consent_datetime)
+        # the test case runs in an atomic block, so nothing is cached
+        with self.assertNumQueries(2):
+            consent_datetime_cache.get_many(['12345', '12346'])
+            consent_datetime_cache.get_many(['12345', '12346'])
+        self.assertEqual(len(consent_datetime_cache), 0)
+        with patch.object(connection, 'in_atomic_block', False):
+            with self.assertNumQueries(1):
+                consent_datetimes = consent_datetime_cache.get_many(
+                    ['12345', '12346', '12347'])
+            self.assertEqual(
+                consent_datetimes,
+                {'12345': consent_datetime, '12346': consent_datetime})
+            with self.assertNumQueries(0):
+                self.assertTrue(consent_datetime_cache.is_registered(
+                    subject_identifier='12345', report_datetime=consent_datetime))
+                self.assertFalse(consent_datetime_cache.is_registered(
+                    subject_identifier='12345',
+                    report_datetime=consent_datetime - relativedelta(days=1)))
+        registered_subject = RegisteredSubject.objects.get(subject_identifier='12345')
+        registered_subject.delete()
+        with self.assertNumQueries(1):
+            self.assertFalse(consent_datetime_cache.is_registered(
+                subject_identifier='12345', report_datetime=consent_datetime))
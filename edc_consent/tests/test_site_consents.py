@@ -0,0 +1,250 @@
+import threading
+import time
+
+from datetime import timedelta
+from django.test import tag
+
+from ..consent_object_validator import ConsentPeriodOverlapError
+from ..consent_periods import ConsentPeriods
+from ..exceptions import ConsentObjectDoesNotExist
+from ..site_consents import site_consents, SiteConsents, SiteConsentError
+from .consent_test_case import ConsentTestCase
+from .dates_test_mixin import DatesTestMixin
+
+
+class TestSiteConsents(DatesTestMixin, ConsentTestCase):
+
+    def register_consecutive_consents(self, count=None, days=None):
+        consents = []
+        for index in range(0, count):
+            start = self.study_open_datetime + timedelta(days=index * days)
+            consents.append(self.consent_object_factory(
+                start=start,
+                end=start + timedelta(days=days) - timedelta(seconds=1),
+                version=str(index)))
+        return consents
+
+    def test_get_consent_for_period(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        for consent in consents:
+            for report_datetime in [consent.start, consent.end]:
+                self.assertEqual(
+                    site_consents.get_consent_for_period(
+                        model='edc_consent.subjectconsent',
+                        report_datetime=report_datetime),
+                    consent)
+
+    def test_get_consent_for_period_outside_of_periods(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        self.assertRaises(
+            SiteConsentError,
+            site_consents.get_consent_for_period,
+            model='edc_consent.subjectconsent',
+            report_datetime=consents[-1].end + timedelta(seconds=1))
+        self.assertRaises(
+            SiteConsentError,
+            site_consents.get_consent_for_period,
+            model='edc_consent.subjectconsent2',
+            report_datetime=consents[0].start)
+
+    def test_get_consent_by_version(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        self.assertEqual(
+            site_consents.get_consent(
+                model='edc_consent.subjectconsent',
+                version='1',
+                report_datetime=consents[1].start),
+            consents[1])
+        self.assertRaises(
+            ConsentObjectDoesNotExist,
+            site_consents.get_consent,
+            model='edc_consent.subjectconsent',
+            version='1',
+            report_datetime=consents[0].start)
+        self.assertRaises(
+            ConsentObjectDoesNotExist,
+            site_consents.get_consent,
+            model='edc_consent.subjectconsent',
+            version='9',
+            report_datetime=consents[0].start)
+
+    def test_get_consent_for_period_with_many_versions(self):
+        consents = self.register_consecutive_consents(count=200, days=1)
+        for consent in consents:
+            self.assertEqual(
+                site_consents.get_consent_for_period(
+                    model='edc_consent.subjectconsent',
+                    report_datetime=consent.start + timedelta(hours=12)),
+                consent)
+
+    def test_registry_reset_resets_index(self):
+        consents = self.register_consecutive_consents(count=1, days=10)
+        site_consents.registry = {}
+        self.assertRaises(
+            SiteConsentError,
+            site_consents.get_consent_for_period,
+            model='edc_consent.subjectconsent',
+            report_datetime=consents[0].start)
+
+    def test_consent_periods_overlapping(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        periods = ConsentPeriods()
+        for consent in reversed(consents):
+            periods.add(consent)
+        self.assertEqual(
+            periods.overlapping(consents[0].end, consents[1].start), consents[0:2])
+        self.assertEqual(periods.covering(consents[2].end), consents[2:])
+        self.assertEqual(
+            periods.covering(consents[2].end + timedelta(seconds=1)), [])
+
+    def test_cache_hits_for_same_day(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        cache_info = site_consents.cache_info()
+        for hours in [1, 2, 3]:
+            site_consents.get_consent_for_period(
+                model='edc_consent.subjectconsent',
+                report_datetime=consents[1].start + timedelta(hours=hours))
+        self.assertEqual(site_consents.cache_info().misses, cache_info.misses + 1)
+        self.assertEqual(site_consents.cache_info().hits, cache_info.hits + 2)
+
+    def test_cache_respects_period_boundary_within_day(self):
+        start = self.study_open_datetime.replace(hour=0, minute=0, second=0)
+        consent1 = self.consent_object_factory(
+            start=start + timedelta(days=1),
+            end=start + timedelta(days=1, hours=11, minutes=59),
+            version='1')
+        consent2 = self.consent_object_factory(
+            start=start + timedelta(days=1, hours=12),
+            end=start + timedelta(days=10),
+            version='2')
+        self.assertEqual(
+            site_consents.get_consent_for_period(
+                model='edc_consent.subjectconsent',
+                report_datetime=start + timedelta(days=1, hours=1)),
+            consent1)
+        self.assertEqual(
+            site_consents.get_consent_for_period(
+                model='edc_consent.subjectconsent',
+                report_datetime=start + timedelta(days=1, hours=13)),
+            consent2)
+
+    def test_register_invalidates_cache(self):
+        consents = self.register_consecutive_consents(count=1, days=10)
+        site_consents.get_consent_for_period(
+            model='edc_consent.subjectconsent',
+            report_datetime=consents[0].start)
+        generation = site_consents.generation
+        self.consent_object_factory(
+            model='edc_consent.subjectconsent2',
+            start=consents[0].start,
+            end=consents[0].end)
+        self.assertEqual(site_consents.generation, generation + 1)
+        self.assertEqual(site_consents.cache_info().currsize, 0)
+
+    def test_consent_period_within_registered_period_overlaps(self):
+        self.consent_object_factory(
+            start=self.study_open_datetime,
+            end=self.study_open_datetime + timedelta(days=50),
+            version='1')
+        self.assertRaises(
+            ConsentPeriodOverlapError, self.consent_object_factory,
+            start=self.study_open_datetime + timedelta(days=10),
+            end=self.study_open_datetime + timedelta(days=20),
+            version='2')
+
+    def test_register_many_consents(self):
+        """Asserts registering a few thousand consents stays fast.
+
+        Regression benchmark for the validator, which used to rescan
+        and resort all registered consents on each register().
+        """
+        started = time.perf_counter()
+        for index in range(0, 3000):
+            start = self.study_open_datetime + timedelta(hours=index)
+            self.consent_object_factory(
+                start=start,
+                end=start + timedelta(minutes=59),
+                version=str(index),
+                updates_versions=[str(index - 1)] if index else None)
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertEqual(len(site_consents.registry), 3000)
+
+    def test_consents_snapshot(self):
+        consents = self.register_consecutive_consents(count=3, days=10)
+        self.assertEqual(site_consents.consents, tuple(consents))
+        self.assertIs(site_consents.consents, site_consents.consents)
+        self.assertEqual(
+            site_consents.get_consents_by_model('edc_consent.subjectconsent'),
+            tuple(consents))
+        self.assertEqual(site_consents.get_consents_by_version('1'), (consents[1], ))
+        self.assertEqual(
+            site_consents.get_consents_by_group(consents[0].group), tuple(consents))
+        consent = self.consent_object_factory(
+            model='edc_consent.subjectconsent2',
+            start=consents[0].start,
+            end=consents[0].end)
+        self.assertEqual(site_consents.consents, tuple(consents) + (consent, ))
+        self.assertEqual(
+            site_consents.get_consents_by_model('edc_consent.subjectconsent2'),
+            (consent, ))
+
+    def test_autodiscover_without_consents_modules(self):
+        consents = self.register_consecutive_consents(count=1, days=10)
+        generation = site_consents.generation
+        site_consents.autodiscover(module_name='no_consents_here', verbose=False)
+        self.assertEqual(site_consents.consents, tuple(consents))
+        self.assertEqual(site_consents.generation, generation + 1)
+
+    def test_autodiscover_logs_one_record(self):
+        consents = self.register_consecutive_consents(count=2, days=10)
+        with self.assertLogs('edc_consent.site_consents', level='INFO') as cm:
+            site_consents.autodiscover(module_name='no_consents_here', verbose=False)
+        self.assertEqual(len(cm.records), 1)
+        self.assertEqual(
+            [consent['name'] for consent in cm.records[0].consents],
+            [consent.name for consent in consents])
+        self.assertIsNotNone(cm.records[0].autodiscover_duration)
+        self.assertEqual(cm.records[0].import_durations, {})
+
+    def test_deferred_autodiscover(self):
+        local_site_consents = SiteConsents()
+        local_site_consents.defer_autodiscover(
+            module_name='no_consents_here', verbose=False)
+        with self.assertLogs('edc_consent.site_consents', level='INFO') as cm:
+            self.assertEqual(local_site_consents.registry, {})
+            local_site_consents.ensure_loaded()
+            self.assertEqual(local_site_consents.consents, ())
+        self.assertEqual(len(cm.records), 1)
+
+    def test_deferred_autodiscover_threads(self):
+        """Asserts a deferred autodiscover runs once when several
+        threads access the registry at the same time.
+        """
+        calls = []
+
+        class LocalSiteConsents(SiteConsents):
+            def autodiscover(self, **kwargs):
+                calls.append(threading.get_ident())
+                time.sleep(0.05)
+                super().autodiscover(**kwargs)
+
+        local_site_consents = LocalSiteConsents()
+        local_site_consents.defer_autodiscover(
+            module_name='no_consents_here', verbose=False)
+        barrier = threading.Barrier(8)
+        registries = []
+
+        def access(index):
+            barrier.wait()
+            if index % 2:
+                local_site_consents.ensure_loaded()
+            registries.append(local_site_consents.registry)
+
+        threads = [threading.Thread(target=access, args=(index, ))
+                   for index in range(0, 8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(registries, [{}] * 8)
@@ -0,0 +1,77 @@
+from dateutil.relativedelta import relativedelta
+from types import SimpleNamespace
+from model_mommy import mommy
+
+from ..view_mixins import ConsentViewMixin
+from .consent_test_case import ConsentTestCase
+from .dates_test_mixin import DatesTestMixin
+
+
+class ConsentModelWrapper:
+
+    model = 'edc_consent.subjectconsent'
+
+    def __init__(self, model_obj=None):
+        self.object = model_obj
+
+
+class ConsentView(ConsentViewMixin):
+
+    consent_model_wrapper_cls = ConsentModelWrapper
+
+    def __init__(self, subject_identifier=None, report_datetime=None, **kwargs):
+        super().__init__(**kwargs)
+        self.subject_identifier = subject_identifier
+        self.appointment = SimpleNamespace(appt_datetime=report_datetime)
+
+
+class TestViewMixins(DatesTestMixin, ConsentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.subject_identifier = '12345'
+        self.consent_datetime = self.study_open_datetime + relativedelta(days=1)
+        self.consent_object_factory(
+            end=self.study_open_datetime + relativedelta(days=50))
+        self.consent_object_factory(
+            start=self.study_open_datetime + relativedelta(days=51),
+            version='2',
+            updates_versions=['1'])
+        self.subject_consent = mommy.make_recipe(
+            'edc_consent.subjectconsent',
+            subject_identifier=self.subject_identifier,
+            consent_datetime=self.consent_datetime,
+            dob=self.dob)
+
+    def test_consent_view_mixin(self):
+        view = ConsentView(
+            subject_identifier=self.subject_identifier,
+            report_datetime=self.consent_datetime)
+        context = view.get_context_data()
+        self.assertEqual(context.get('consent').object, self.subject_consent)
+        self.assertEqual(context.get('consent_object').version, '1')
+        self.assertEqual(
+            [wrapper.object for wrapper in context.get('consents')],
+            [self.subject_consent])
+
+    def test_consent_view_mixin_queries(self):
+        """Asserts a dashboard render, context plus template access,
+        queries the consents once.
+        """
+        view = ConsentView(
+            subject_identifier=self.subject_identifier,
+            report_datetime=self.consent_datetime)
+        with self.assertNumQueries(1):
+            context = view.get_context_data()
+            for _ in range(0, 2):
+                list(context.get('consents'))
+                view.consent_wrapped
+                view.consent_object
+
+    def test_consent_view_mixin_empty_consent(self):
+        view = ConsentView(
+            subject_identifier='99999',
+            report_datetime=self.consent_datetime)
+        context = view.get_context_data()
+        self.assertTrue(context.get('consent').object._state.adding)
+        self.assertEqual(context.get('consents'), [])
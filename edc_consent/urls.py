@@ -1,11 +1,13 @@
 from django.conf.urls import url
 
-from .views import HomeView
+from .views import HomeView, ConsentExportView
 from .admin_site import edc_consent_admin
 
 app_name = 'edc_consent'
 
 urlpatterns = [
     url(r'^admin/', edc_consent_admin.urls),
+    url(r'^export/(?P<model>\w+\.\w+)/$', ConsentExportView.as_view(),
+        name='export_url'),
     url(r'^', HomeView.as_view(), name='home_url'),
 ]
@@ -8,6 +8,9 @@ from .site_consents import site_consents
 class ConsentViewMixin(ContextMixin):
 
     """Declare with edc_appointment view mixin to get `appointment`.
+
+    Values are resolved once per view instance. Consents are
+    fetched with one query.
     """
 
     consent_model_wrapper_cls = None
@@ -15,7 +18,11 @@ class ConsentViewMixin(ContextMixin):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._consent = None
+        self._consent_object = None
+        self._consent_wrapped = None
         self._consents = None
+        self._consents_wrapped = None
+        self._report_datetime = None
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -27,43 +34,53 @@ class ConsentViewMixin(ContextMixin):
 
     @property
     def report_datetime(self):
-        report_datetime = None
-        try:
-            report_datetime = self.appointment.visit.report_datetime
-        except AttributeError:
+        if not self._report_datetime:
+            report_datetime = None
             try:
-                report_datetime = self.appointment.appt_datetime
+                report_datetime = self.appointment.visit.report_datetime
             except AttributeError:
-                pass
-        return report_datetime or get_utcnow()
+                try:
+                    report_datetime = self.appointment.appt_datetime
+                except AttributeError:
+                    pass
+            self._report_datetime = report_datetime or get_utcnow()
+        return self._report_datetime
 
     @property
     def consent_object(self):
         """Returns a consent_config object or None
         from site_consents for the current reporting period.
         """
-        try:
-            consent_object = site_consents.get_consent_for_period(
-                model=self.consent_model_wrapper_cls.model,
-                report_datetime=self.report_datetime)
-        except ConsentObjectDoesNotExist:
-            consent_object = None
-        return consent_object
+        if not self._consent_object:
+            try:
+                self._consent_object = site_consents.get_consent_for_period(
+                    model=self.consent_model_wrapper_cls.model,
+                    report_datetime=self.report_datetime)
+            except ConsentObjectDoesNotExist:
+                pass
+        return self._consent_object
 
     @property
     def consent(self):
         """Returns a consent model instance or None for the current period.
+
+        Taken from `consents` instead of querying again.
         """
-        return self.consent_object.model_cls.consent.consent_for_period(
-            subject_identifier=self.subject_identifier,
-            report_datetime=self.report_datetime)
+        if not self._consent:
+            for consent in self.consents:
+                if consent.version == self.consent_object.version:
+                    self._consent = consent
+        return self._consent
 
     @property
     def consent_wrapped(self):
         """Returns a wrapped consent, either saved or not,
         for the current period.
         """
-        return self.consent_model_wrapper_cls(self.consent or self.empty_consent)
+        if not self._consent_wrapped:
+            self._consent_wrapped = self.consent_model_wrapper_cls(
+                self.consent or self.empty_consent)
+        return self._consent_wrapped
 
     @property
     def empty_consent(self):
@@ -79,12 +96,20 @@ class ConsentViewMixin(ContextMixin):
     @property
     def consents(self):
         """Returns a Queryset of consents for this subject.
+
+        The same queryset is returned on each access so that it is
+        evaluated once.
         """
-        return self.consent_object.model_cls.objects.filter(
-            subject_identifier=self.subject_identifier).order_by('version')
+        if self._consents is None:
+            self._consents = self.consent_object.model_cls.objects.filter(
+                subject_identifier=self.subject_identifier).order_by('version')
+        return self._consents
 
     @property
     def consents_wrapped(self):
-        """Returns a generator of wrapped consents.
+        """Returns a list of wrapped consents.
         """
-        return (self.consent_model_wrapper_cls(obj) for obj in self.consents)
+        if self._consents_wrapped is None:
+            self._consents_wrapped = [
+                self.consent_model_wrapper_cls(obj) for obj in self.consents]
+        return self._consents_wrapped
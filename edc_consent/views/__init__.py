@@ -1 +1,2 @@
+from .consent_export_view import ConsentExportView
 from .home_view import HomeView
@@ -0,0 +1,44 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
+from django.views.generic.base import View
+
+from ..consent_exporter import ConsentExporter, ConsentExportError
+
+
+class ConsentExportView(LoginRequiredMixin, View):
+
+    """Streams a consent model as CSV or JSON lines.
+
+    Returns 404 if the model is not a consent model. Requires the
+    model's view permission. Encrypted fields are masked unless
+    listed in the `decrypt` query parameter, which also requires
+    the change permission; without it the request is denied.
+
+        /export/edc_example.subjectconsent/?format=jsonl&decrypt=initials
+    """
+
+    exporter_cls = ConsentExporter
+    content_types = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+    def get(self, request, *args, **kwargs):
+        try:
+            exporter = self.exporter_cls(
+                model=kwargs.get('model'),
+                fields=request.GET.getlist('field'),
+                decrypt=request.GET.getlist('decrypt'),
+                export_format=request.GET.get('format'))
+        except (LookupError, ValueError, ConsentExportError) as e:
+            raise Http404(e)
+        opts = exporter.model_cls._meta
+        if not request.user.has_perm(f'{opts.app_label}.view_{opts.model_name}'):
+            raise PermissionDenied
+        if exporter.decrypt and not request.user.has_perm(
+                f'{opts.app_label}.change_{opts.model_name}'):
+            raise PermissionDenied
+        response = StreamingHttpResponse(
+            exporter.lines(),
+            content_type=self.content_types.get(exporter.export_format))
+        response['Content-Disposition'] = (
+            f'attachment; filename="{opts.model_name}.{exporter.export_format}"')
+        return response
@@ -22,7 +22,7 @@ setup(
     long_description=README,
     zip_safe=False,
     keywords='django participant ICF',
-    install_requires=['toolz'],
+    install_requires=['asgiref>=3.2', 'toolz'],
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',